@@ -0,0 +1,100 @@
+// CATALOG CATEGORY FILTER - LOADS NON-FEATURED CARDS ON DEMAND
+// The page only ships the featured cards (see catalog.py); every other
+// category is fetched from /api/catalog/<category> the first time its filter
+// button is clicked and kept in memory after that.
+(function() {
+    const fragments = new Map();
+
+    function catalogGrid() {
+        return document.querySelector('.additional-codes-grid[data-catalog]');
+    }
+
+    function fetchCategory(category, page) {
+        const key = category + ':' + page;
+        if (!fragments.has(key)) {
+            const url = catalogGrid().getAttribute('data-catalog') + '/' + encodeURIComponent(category) +
+                '?format=html&page=' + page;
+            const request = fetch(url).then(response => {
+                if (!response.ok) {
+                    throw new Error('catalog ' + response.status);
+                }
+                const nextPage = response.headers.get('X-Next-Page');
+                return response.text().then(html => ({ html: html, nextPage: nextPage }));
+            });
+            // Forget failed requests so the next click retries
+            request.catch(() => fragments.delete(key));
+            fragments.set(key, request);
+        }
+        return fragments.get(key);
+    }
+
+    // The page styles both grids with "display: grid !important", so hiding
+    // needs an !important inline style too; removing it shows the grid again.
+    function setVisible(element, visible) {
+        if (visible) {
+            element.style.removeProperty('display');
+        } else {
+            element.style.setProperty('display', 'none', 'important');
+        }
+    }
+
+    function showMoreButton(grid, category, nextPage) {
+        const button = document.createElement('button');
+        button.className = 'filter-btn catalog-more';
+        button.textContent = 'Show more';
+        button.onclick = function() {
+            button.remove();
+            loadInto(grid, category, Number(nextPage), true);
+        };
+        grid.appendChild(button);
+    }
+
+    function loadInto(grid, category, page, append) {
+        grid.setAttribute('data-loading', category);
+        return fetchCategory(category, page).then(result => {
+            if (grid.getAttribute('data-loading') !== category) {
+                return;  // another filter was clicked meanwhile
+            }
+            if (append) {
+                grid.insertAdjacentHTML('beforeend', result.html);
+            } else {
+                grid.innerHTML = result.html;
+            }
+            if (result.nextPage) {
+                showMoreButton(grid, category, result.nextPage);
+            }
+        }).catch(() => {
+            grid.innerHTML = '<p class="catalog-error">Could not load these codes. Please try again.</p>';
+        });
+    }
+
+    window.filterDiscountCodes = function(category) {
+        document.querySelectorAll('.filter-btn').forEach(btn => {
+            const onclick = btn.getAttribute('onclick');
+            btn.classList.toggle('active', !!onclick && onclick.includes(`'${category}'`));
+        });
+
+        const featuredGrid = document.querySelector('.featured-codes-grid');
+        const grid = catalogGrid();
+        if (!grid) {
+            return;
+        }
+        if (category === 'featured') {
+            grid.removeAttribute('data-loading');
+            setVisible(grid, false);
+            if (featuredGrid) {
+                setVisible(featuredGrid, true);
+            }
+            return;
+        }
+        if (featuredGrid) {
+            setVisible(featuredGrid, false);
+        }
+        setVisible(grid, true);
+        loadInto(grid, category, 1, false);
+    };
+
+    document.addEventListener('DOMContentLoaded', function() {
+        window.filterDiscountCodes('featured');
+    });
+})();
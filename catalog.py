@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Discount-code catalog for the "Nest Approved" cards.
+
+The pages ship every .code-card (logo, code, category) in the initial HTML and
+simple-filter.js hides the ones that don't match the current filter. `build`
+pulls the cards out of a page into build/catalog.json and writes
+build/catalog.html, a copy of the page that only carries the featured cards;
+the other categories are fetched from /api/catalog/<category> (serve_site.py)
+by assets/js/catalog-filter.js when their filter button is clicked.
+
+    python3 catalog.py build [PAGE]      # default: empty-nest-website/index-backup.html
+    python3 catalog.py list [CATEGORY]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from html import unescape
+
+BUILD_DIR = 'build'
+CATALOG_PATH = os.path.join(BUILD_DIR, 'catalog.json')
+PAGE_PATH = os.path.join(BUILD_DIR, 'catalog.html')
+DEFAULT_PAGE = os.path.join('empty-nest-website', 'index-backup.html')
+FILTER_SCRIPT = 'assets/js/catalog-filter.js'
+PER_PAGE = 24
+
+CARD_START_RE = re.compile(r'<div\b[^>]*\bclass\s*=\s*"code-card(?:\s[^"]*)?"[^>]*>', re.IGNORECASE)
+DIV_TAG_RE = re.compile(r'<div\b[^>]*>|</div\s*>', re.IGNORECASE)
+ADDITIONAL_GRID_RE = re.compile(r'<div\b[^>]*\bclass\s*=\s*"additional-codes-grid"[^>]*>', re.IGNORECASE)
+LEADING_COMMENT_RE = re.compile(r'<!--([^>]*?)-->\s*$')
+BRAND_ICON_RE = re.compile(r'<a\b[^>]*class="brand-icon"[^>]*>(.*?)</a>', re.DOTALL)
+TAG_RE = re.compile(r'<[^>]+>')
+ATTR_RE = {
+    'category': re.compile(r'\bdata-category\s*=\s*"([^"]*)"'),
+    'code': re.compile(r'<span class="code-text">([^<]*)</span>'),
+    'desc': re.compile(r'<p class="brand-desc">([^<]*)</p>'),
+    'url': re.compile(r'<a href="([^"]*)"[^>]*class="brand-icon"'),
+    'logo': re.compile(r'<img src="([^"]*)"[^>]*class="brand-logo-img"'),
+    'logo_alt': re.compile(r'<img [^>]*alt="([^"]*)"[^>]*class="brand-logo-img"'),
+    'image': re.compile(r'<img src="([^"]*)"[^>]*class="product-image"'),
+}
+
+
+def element_end(text, start):
+    """Offset just past the </div> that closes the <div> opening at start."""
+    depth = 0
+    for match in DIV_TAG_RE.finditer(text, start):
+        depth += -1 if match.group().startswith('</') else 1
+        if depth == 0:
+            return match.end()
+    return len(text)
+
+
+def iter_cards(text):
+    """Yield (start, end) of every .code-card <div> in text."""
+    position = 0
+    while True:
+        match = CARD_START_RE.search(text, position)
+        if not match:
+            return
+        end = element_end(text, match.start())
+        yield match.start(), end
+        position = end
+
+
+def dedent(markup):
+    return '\n'.join(line.strip() for line in markup.splitlines() if line.strip())
+
+
+def card_fields(markup, preceding=''):
+    """Pull the catalog fields out of one card's markup."""
+    fields = {}
+    for name, pattern in ATTR_RE.items():
+        match = pattern.search(markup)
+        fields[name] = unescape(match.group(1)).strip() if match else None
+
+    brand = fields.pop('logo_alt')
+    comment = LEADING_COMMENT_RE.search(preceding)
+    if not brand and comment:
+        # Cards with inline SVG logos are only named by the comment above them
+        brand = re.sub(r'\s*CARD\b.*$', '', comment.group(1).strip()).title()
+    if not brand:
+        # ...or by the text of their placeholder logo
+        icon = BRAND_ICON_RE.search(markup)
+        label = ' '.join(unescape(TAG_RE.sub(' ', icon.group(1))).split()) if icon else ''
+        brand = label.title() or None
+    opening = CARD_START_RE.match(markup).group()
+    fields.update({
+        'brand': brand,
+        'featured': 'featured-card' in opening.split('class="', 1)[1].split('"', 1)[0].split(),
+        'category': fields['category'] or 'other',
+    })
+    if fields['logo'] and fields['logo'].startswith('data:'):
+        fields['logo'] = None
+    fields['html'] = dedent(markup)
+    return fields
+
+
+def extract(text):
+    """Return (cards, page_without_non_featured_cards)."""
+    cards = []
+    kept = []
+    position = 0
+    for start, end in iter_cards(text):
+        card = card_fields(text[start:end], text[max(0, start - 200):start])
+        card['id'] = len(cards)
+        cards.append(card)
+        if not card['featured']:
+            kept.append(text[position:start])
+            position = end
+    kept.append(text[position:])
+    return cards, ''.join(kept)
+
+
+def trim_page(page):
+    """Point the page at catalog-filter.js so other categories load on demand."""
+    page = ADDITIONAL_GRID_RE.sub(
+        lambda m: m.group()[:-1] + ' data-catalog="/api/catalog">', page, count=1)
+    tag = f'    <script src="{FILTER_SCRIPT}"></script>\n'
+    index = page.lower().rfind('</body>')
+    if index == -1:
+        return page + tag
+    return page[:index] + tag + page[index:]
+
+
+def build(page_path=DEFAULT_PAGE, catalog_path=CATALOG_PATH, out_path=PAGE_PATH):
+    with open(page_path, encoding='utf-8') as f:
+        text = f.read()
+    cards, page = extract(text)
+    if not cards:
+        raise ValueError(f'{page_path} has no .code-card elements')
+
+    catalog = {'source': page_path, 'cards': cards}
+    catalog['version'] = hashlib.sha256(
+        json.dumps(cards, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    os.makedirs(os.path.dirname(catalog_path) or '.', exist_ok=True)
+    with open(catalog_path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, separators=(',', ':'))
+    with open(out_path, 'w', encoding='utf-8') as f:
+        f.write(trim_page(page))
+    return catalog, len(text), len(page)
+
+
+class Catalog:
+    """In-memory category index over build/catalog.json.
+
+    Responses are rendered once per (category, page, per_page, format) and
+    kept until the catalog file changes.
+    """
+
+    def __init__(self, path=CATALOG_PATH):
+        self.path = path
+        self.mtime = None
+        self.cards = []
+        self.version = None
+        self.index = {}
+        self.responses = {}
+
+    def refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self.mtime:
+            return False
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        self.mtime = mtime
+        self.cards = data['cards']
+        self.version = data['version']
+        self.index = {'all': list(range(len(self.cards))),
+                      'featured': [c['id'] for c in self.cards if c['featured']]}
+        for card in self.cards:
+            self.index.setdefault(card['category'], []).append(card['id'])
+        self.responses = {}
+        return True
+
+    def summary(self):
+        return {'version': self.version,
+                'categories': {name: len(ids) for name, ids in self.index.items()}}
+
+    def query(self, category, page=1, per_page=PER_PAGE, fmt='json'):
+        """Return (body bytes, content type, etag, extra headers) or None."""
+        fmt = 'html' if fmt == 'html' else 'json'
+        key = (category, page, per_page, fmt)
+        cached = self.responses.get(key)
+        if cached is not None:
+            return cached
+        ids = self.index.get(category)
+        if ids is None or page < 1 or per_page < 1:
+            return None
+        if page > 1 and (page - 1) * per_page >= len(ids):
+            return None  # past the end; only real pages get cached
+
+        chunk = [self.cards[i] for i in ids[(page - 1) * per_page:page * per_page]]
+        next_page = page + 1 if page * per_page < len(ids) else None
+        headers = {'X-Total-Count': str(len(ids))}
+        if next_page:
+            headers['X-Next-Page'] = str(next_page)
+        if fmt == 'html':
+            body = '\n'.join(card['html'] for card in chunk).encode('utf-8')
+            content_type = 'text/html; charset=utf-8'
+        else:
+            body = json.dumps({
+                'category': category, 'page': page, 'per_page': per_page,
+                'total': len(ids), 'next_page': next_page,
+                'cards': [{k: v for k, v in card.items() if k != 'html'} for card in chunk],
+            }, separators=(',', ':')).encode('utf-8')
+            content_type = 'application/json'
+        etag = '"{}"'.format(hashlib.sha256(
+            f'{self.version}:{category}:{page}:{per_page}:{fmt}'.encode()).hexdigest()[:24])
+        self.responses[key] = (body, content_type, etag, headers)
+        return self.responses[key]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--root', default=os.path.dirname(os.path.abspath(__file__)))
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_cmd = commands.add_parser('build', help='extract cards and write the trimmed page')
+    build_cmd.add_argument('page', nargs='?', default=DEFAULT_PAGE)
+    list_cmd = commands.add_parser('list', help='show the built catalog')
+    list_cmd.add_argument('category', nargs='?', default='all')
+    args = parser.parse_args(argv)
+
+    os.chdir(args.root)
+    if args.command == 'build':
+        catalog, before, after = build(args.page)
+        featured = sum(card['featured'] for card in catalog['cards'])
+        print(f"✅ {len(catalog['cards'])} cards ({featured} featured) -> {CATALOG_PATH}")
+        print(f'📄 {PAGE_PATH}: {before // 1024}K -> {after // 1024}K initial HTML')
+        return 0
+
+    catalog = Catalog()
+    if not catalog.refresh():
+        print(f'❌ {CATALOG_PATH} not found - run `build` first', file=sys.stderr)
+        return 1
+    for card_id in catalog.index.get(args.category, []):
+        card = catalog.cards[card_id]
+        star = '★' if card['featured'] else ' '
+        print(f"{star} {card['category']:10} {card['code'] or '-':14} {card['brand']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
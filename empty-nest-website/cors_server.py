@@ -1,29 +1,114 @@
 #!/usr/bin/env python3
 import http.server
 import socketserver
-from urllib.parse import urlparse
+from urllib.parse import urlparse, unquote
 import os
+import sys
 import mimetypes
+import posixpath
+
+# export.py lives one directory up, next to the HTML variants
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from export import Manifest, MANIFEST_NAME
+import profiling
 
 class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # Memory-mapped manifest written by `export.py`; when present, files listed
+    # in it are served without walking or hashing the tree (one fstat() on the
+    # opened file catches files changed in the deploy dir after the export)
+    manifest = None
+
     def end_headers(self):
         # Add CORS headers
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', '*')
-        
-        # Add aggressive cache-busting headers
-        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate, max-age=0')
-        self.send_header('Pragma', 'no-cache')
-        self.send_header('Expires', '0')
-        self.send_header('Last-Modified', 'Mon, 30 Sep 2024 20:55:00 GMT')
-        
+
+        if getattr(self, 'manifest_entry', None) is None:
+            # Add aggressive cache-busting headers
+            self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate, max-age=0')
+            self.send_header('Pragma', 'no-cache')
+            self.send_header('Expires', '0')
+            self.send_header('Last-Modified', 'Mon, 30 Sep 2024 20:55:00 GMT')
+        else:
+            # Exported files carry an ETag, so revalidating is enough
+            self.send_header('Cache-Control', 'no-cache')
+
         super().end_headers()
-    
+
+    def send_head(self):
+        self.manifest_entry = None
+        path = posixpath.normpath(unquote(urlparse(self.path).path))
+        name = posixpath.basename(path)
+        if name == MANIFEST_NAME or name.endswith('.tmp'):
+            # Export bookkeeping, not part of the site
+            self.send_error(404, "File not found")
+            return None
+        if self.manifest is None:
+            return super().send_head()
+
+        if self.path.split('?', 1)[0].endswith('/') or path == '/':
+            path = posixpath.join(path, 'index.html')
+        entry = self.manifest.lookup(path)
+        if entry is None:
+            return super().send_head()
+
+        filename = os.path.join(self.directory, path.lstrip('/'))
+        try:
+            f = open(filename, 'rb')
+        except OSError:
+            # Manifest is stale (file removed after export): fall back to the tree
+            return super().send_head()
+        st = os.fstat(f.fileno())
+        if st.st_size != entry['size'] or st.st_mtime_ns != entry['mtime']:
+            # File changed since the export; the manifest and the .gz sibling
+            # no longer describe it, so serve the file itself
+            f.close()
+            return super().send_head()
+
+        size = entry['size']
+        etag = entry['etag']
+        encoding = None
+        if 'gzip' in entry['encodings'] and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            # The encoded body is a different representation: give it its own ETag
+            size = entry['encodings']['gzip']
+            etag = etag[:-1] + '-gz"'
+            encoding = 'gzip'
+
+        self.manifest_entry = entry
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            f.close()
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return None
+
+        if encoding:
+            try:
+                gz = open(filename + '.gz', 'rb')
+            except OSError:
+                # .gz sibling gone: fall back to the identity body
+                size, etag, encoding = entry['size'], entry['etag'], None
+            else:
+                f.close()
+                f = gz
+
+        self.send_response(200)
+        self.send_header('Content-type', entry['type'])
+        self.send_header('Content-Length', str(size))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', self.date_time_string(entry['mtime'] // 10**9))
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        return f
+
     def do_OPTIONS(self):
         self.send_response(200)
         self.end_headers()
-    
+
     def log_message(self, format, *args):
         # Print access logs to help debug
         print(f"[{self.date_time_string()}] {format % args}")
@@ -31,8 +116,20 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 if __name__ == "__main__":
     PORT = 8089
     os.chdir('/home/user/webapp/empty-nest-deploy')
-    
+
+    if os.path.exists(MANIFEST_NAME):
+        CORSHTTPRequestHandler.manifest = Manifest(MANIFEST_NAME)
+
+    if profiling.enabled_from_env():
+        profiling.install(CORSHTTPRequestHandler)
+
     with socketserver.TCPServer(("", PORT), CORSHTTPRequestHandler) as httpd:
         print(f"Serving at port {PORT} with CORS and cache-busting headers")
         print(f"Directory: {os.getcwd()}")
-        httpd.serve_forever()
\ No newline at end of file
+        if CORSHTTPRequestHandler.manifest is not None:
+            print(f"Manifest: {len(CORSHTTPRequestHandler.manifest)} files (memory-mapped)")
+        else:
+            print("Manifest: none (run export.py to create one)")
+        if profiling.enabled_from_env():
+            print(f"Profiling: kill -USR1 {os.getpid()} or http://localhost:{PORT}/__admin/")
+        httpd.serve_forever()
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Export one variant of the site into empty-nest-deploy/.
+
+Starting from the chosen page, every local file it references (src, href,
+srcset, poster, CSS url()/@import, quoted asset paths in JS, and linked local
+pages) is followed recursively and only that set is placed in the deploy
+directory. The page itself becomes index.html.
+
+Unchanged files are skipped using the state kept in .build-cache/export.json,
+files are reflinked where the filesystem allows (copied otherwise, never
+hardlinked, so editing a source cannot change the deployed file), and the
+work runs on a thread pool. Text files also get a precompressed .gz sibling
+when it is smaller.
+
+Finally a binary manifest (.manifest) is written next to the files: an
+open-addressing hash table of URL path -> sha256, size, mtime, content type,
+available encodings and ETag that cors_server.py memory-maps at startup, so
+serving never stats or hashes the tree.
+
+    python3 export.py VARIANT [--out empty-nest-deploy] [--minify] [--strip-console]
+
+VARIANT is an HTML file (MASTER_CLEAN.html) or a page name from templates/
+(see partials.py).
+"""
+import argparse
+import fcntl
+import gzip
+import hashlib
+import json
+import mimetypes
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlsplit
+
+import minify
+import partials
+
+DEPLOY_DIR = 'empty-nest-deploy'
+STATE_PATH = os.path.join('.build-cache', 'export.json')
+MANIFEST_NAME = '.manifest'
+CHUNK_SIZE = 64 * 1024
+FICLONE = 0x40049409  # linux/fs.h
+
+COMPRESSIBLE = {'text/html', 'text/css', 'text/javascript', 'application/javascript',
+                'application/json', 'image/svg+xml', 'text/plain', 'text/xml'}
+ENCODINGS = ('gzip',)
+
+HTML_REF_RE = re.compile(
+    r'''\b(?:src|href|poster|data-src|data-background)\s*=\s*(?:"([^"]*)"|'([^']*)')''',
+    re.IGNORECASE)
+SRCSET_RE = re.compile(r'''\bsrcset\s*=\s*(?:"([^"]*)"|'([^']*)')''', re.IGNORECASE)
+CSS_URL_RE = re.compile(r'''url\(\s*(?:"((?:[^"\\]|\\.)*)"|'((?:[^'\\]|\\.)*)'|([^)'"\s]+))\s*\)''')
+CSS_IMPORT_RE = re.compile(r'''@import\s+(?:"([^"]*)"|'([^']*)')''')
+JS_PATH_RE = re.compile(r'''["'`]((?:\.{0,2}/)?assets/[^"'`\s\\]+)["'`]''')
+
+# Manifest layout (little-endian):
+#   header   magic, version, record count, bucket count, record offset, strings offset
+#   buckets  u32 record index + 1 per slot (0 = empty), linear probing on crc32(path)
+#   records  fixed-size entries, see RECORD
+#   strings  UTF-8 paths and content types
+MANIFEST_MAGIC = b'ENMF'
+MANIFEST_VERSION = 1
+HEADER = struct.Struct('<4sHxxIIII')
+BUCKET = struct.Struct('<I')
+RECORD = struct.Struct('<IHIHQQQ32sB7x')
+ENCODING_BITS = {name: 1 << i for i, name in enumerate(ENCODINGS)}
+
+
+def content_type(path):
+    kind, _ = mimetypes.guess_type(path)
+    return kind or 'application/octet-stream'
+
+
+def local_target(ref, base_dir, root):
+    """Resolve a reference to a path under root, or None for external/data refs."""
+    ref = ref.strip().replace('\\', '')
+    if not ref or ref.startswith(('#', 'data:', 'mailto:', 'tel:', 'javascript:', '//', '{{')):
+        return None
+    url = urlsplit(ref)
+    if url.scheme or url.netloc:
+        return None
+    path = unquote(url.path)
+    if not path:
+        return None
+    if path.startswith('/'):
+        target = os.path.normpath(os.path.join(root, path.lstrip('/')))
+    else:
+        target = os.path.normpath(os.path.join(base_dir, path))
+    if os.path.commonpath([os.path.abspath(target), os.path.abspath(root)]) != os.path.abspath(root):
+        return None
+    return target
+
+
+def references(path, text):
+    """Raw reference strings found in one HTML, CSS or JS file."""
+    ext = os.path.splitext(path)[1].lower()
+    refs = []
+    if ext in ('.html', '.htm'):
+        refs += [a or b for a, b in HTML_REF_RE.findall(text)]
+        for a, b in SRCSET_RE.findall(text):
+            refs += [candidate.split()[0] for candidate in (a or b).split(',') if candidate.strip()]
+    if ext in ('.html', '.htm', '.css'):
+        refs += [a or b or c for a, b, c in CSS_URL_RE.findall(text)]
+        refs += [a or b for a, b in CSS_IMPORT_RE.findall(text)]
+    if ext in ('.html', '.htm', '.js'):
+        refs += JS_PATH_RE.findall(text)
+    return refs
+
+
+def dependency_graph(entry, root):
+    """Walk references from entry; returns ({file: [deps]}, missing refs)."""
+    graph = {}
+    missing = set()
+    entry = os.path.normpath(entry)
+    # The entry is deployed as index.html, so links home point at it
+    home = os.path.normpath(os.path.join(root, 'index.html'))
+    pending = [entry]
+    while pending:
+        path = pending.pop()
+        if path in graph:
+            continue
+        graph[path] = []
+        if os.path.splitext(path)[1].lower() not in ('.html', '.htm', '.css', '.js'):
+            continue
+        with open(path, encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        # Relative refs resolve against the referencing file, except in the
+        # entry page and in JS, which are relative to the site root.
+        base_dir = root if path == entry or path.endswith('.js') else os.path.dirname(path)
+        for ref in references(path, text):
+            target = local_target(ref, base_dir, root)
+            if target is None:
+                continue
+            if target == home:
+                target = entry
+            if not os.path.isfile(target):
+                missing.add(os.path.relpath(target, root))
+                continue
+            graph[path].append(target)
+            pending.append(target)
+    return graph, sorted(missing)
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+def place(src, dest):
+    """Reflink or copy src to dest; returns the method used."""
+    tmp = f'{dest}.{os.getpid()}.tmp'
+    if os.path.lexists(tmp):
+        os.unlink(tmp)
+    try:
+        with open(src, 'rb') as s, open(tmp, 'wb') as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dest)
+        return 'reflink'
+    except OSError:
+        if os.path.lexists(tmp):
+            os.unlink(tmp)
+    shutil.copy2(src, tmp)
+    os.replace(tmp, dest)
+    return 'copy'
+
+
+def precompress(path, kind):
+    """Write path.gz if it is worth it; returns the encodings available."""
+    gz_path = path + '.gz'
+    if kind.split(';')[0] not in COMPRESSIBLE:
+        if os.path.exists(gz_path):
+            os.unlink(gz_path)
+        return []
+    with open(path, 'rb') as f:
+        data = f.read()
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(compressed) >= len(data):
+        if os.path.exists(gz_path):
+            os.unlink(gz_path)
+        return []
+    with open(gz_path + '.tmp', 'wb') as f:
+        f.write(compressed)
+    os.replace(gz_path + '.tmp', gz_path)
+    return ['gzip']
+
+
+def export_file(job):
+    """Place one file in the deploy dir. Runs on the worker pool."""
+    src, rel, dest, previous, options = job
+    st = os.stat(src)
+    # Hardlinks left by older exports share the source inode: place them again
+    current = os.path.exists(dest) and not os.path.samefile(src, dest)
+    if previous and previous['src'] == src and previous['mtime'] == st.st_mtime_ns \
+            and previous['size'] == st.st_size and previous['options'] == options and current:
+        return dict(previous, rel=rel, action='unchanged')
+
+    digest = file_digest(src).hex()
+    if previous and previous['hash'] == digest and previous['options'] == options and current:
+        return dict(previous, rel=rel, mtime=st.st_mtime_ns, size=st.st_size, action='unchanged')
+
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    kind = content_type(dest)
+    if options.get('minify') and os.path.splitext(src)[1].lower() in minify.EXTENSIONS:
+        minify.minify_file(src, dest, options.get('strip_console', False))
+        action = 'minified'
+    else:
+        action = place(src, dest)
+    encodings = precompress(dest, kind)
+    out = os.stat(dest)
+    return {'rel': rel, 'src': src, 'mtime': st.st_mtime_ns, 'size': st.st_size,
+            'hash': digest, 'options': options, 'action': action,
+            'out_hash': file_digest(dest).hex(), 'out_size': out.st_size,
+            'out_mtime': out.st_mtime_ns, 'type': kind, 'encodings': encodings}
+
+
+class Manifest:
+    """Read-only view of a deploy manifest through mmap.
+
+    Opening it costs one mmap; each lookup hashes the path and probes the
+    bucket table, so startup does not depend on the number of files.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.buckets, self.records, self.strings = \
+            HEADER.unpack_from(self.map, 0)
+        if magic != MANIFEST_MAGIC or version != MANIFEST_VERSION:
+            raise ValueError(f'{path} is not a version {MANIFEST_VERSION} deploy manifest')
+
+    def close(self):
+        self.map.close()
+
+    def __len__(self):
+        return self.count
+
+    def _string(self, offset, length):
+        start = self.strings + offset
+        return self.map[start:start + length]
+
+    def _record(self, index):
+        return RECORD.unpack_from(self.map, self.records + index * RECORD.size)
+
+    def _entry(self, record, url_path):
+        _, _, type_off, type_len, size, mtime, gz_size, digest, encodings = record
+        return {
+            'path': url_path, 'size': size, 'mtime': mtime,
+            'type': self._string(type_off, type_len).decode('utf-8'),
+            'hash': digest.hex(), 'etag': f'"{digest[:16].hex()}"',
+            'encodings': {name: gz_size for name, bit in ENCODING_BITS.items() if encodings & bit},
+        }
+
+    def lookup(self, url_path):
+        """Entry for a URL path like '/assets/css/style.css', or None."""
+        key = url_path.encode('utf-8')
+        slot = zlib.crc32(key) % self.buckets
+        for _ in range(self.buckets):
+            (index,) = BUCKET.unpack_from(self.map, HEADER.size + slot * BUCKET.size)
+            if index == 0:
+                return None
+            record = self._record(index - 1)
+            if self._string(record[0], record[1]) == key:
+                return self._entry(record, url_path)
+            slot = (slot + 1) % self.buckets
+        return None
+
+    def __iter__(self):
+        for index in range(self.count):
+            record = self._record(index)
+            yield self._entry(record, self._string(record[0], record[1]).decode('utf-8'))
+
+
+def write_manifest(entries, path):
+    """entries: [(url_path, size, mtime_ns, type, sha256 bytes, encodings, gz_size)]"""
+    buckets = max(8, 1 << (2 * len(entries) - 1).bit_length())  # load factor <= 0.5
+    strings = bytearray()
+    offsets = {}
+
+    def intern(text):
+        data = text.encode('utf-8')
+        if data not in offsets:
+            offsets[data] = len(strings)
+            strings.extend(data)
+        return offsets[data], len(data)
+
+    table = [0] * buckets
+    records = bytearray()
+    for index, (url_path, size, mtime, kind, digest, encodings, gz_size) in enumerate(entries):
+        path_off, path_len = intern(url_path)
+        type_off, type_len = intern(kind)
+        bits = 0
+        for name in encodings:
+            bits |= ENCODING_BITS[name]
+        records += RECORD.pack(path_off, path_len, type_off, type_len, size, mtime,
+                               gz_size, digest, bits)
+        slot = zlib.crc32(url_path.encode('utf-8')) % buckets
+        while table[slot]:
+            slot = (slot + 1) % buckets
+        table[slot] = index + 1
+
+    record_offset = HEADER.size + buckets * BUCKET.size
+    strings_offset = record_offset + len(records)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MANIFEST_MAGIC, MANIFEST_VERSION, len(entries), buckets,
+                            record_offset, strings_offset))
+        f.write(b''.join(BUCKET.pack(slot) for slot in table))
+        f.write(records)
+        f.write(strings)
+    os.replace(tmp, path)
+
+
+def resolve_variant(variant, root):
+    """Return the HTML file for a variant, compiling template pages first."""
+    if os.path.isfile(variant):
+        return os.path.normpath(variant)
+    site = partials.Site(os.path.join(root, partials.TEMPLATES_DIR))
+    if variant in site.page_names():
+        partials.build(site, [variant], os.path.join(root, partials.BUILD_DIR))
+        return os.path.join(partials.BUILD_DIR, variant + '.html')
+    raise FileNotFoundError(f'{variant}: no such file or templates page')
+
+
+def export(variant, out_dir=DEPLOY_DIR, minify_files=False, strip_console=False,
+           workers=None, root='.'):
+    """Export variant into out_dir; returns a summary dict."""
+    page = resolve_variant(variant, root)
+    # A page built from templates lives in build/ but its assets live in root
+    site_root = root if page.startswith(partials.BUILD_DIR + os.sep) else os.path.dirname(page) or '.'
+    graph, missing = dependency_graph(page, site_root)
+
+    try:
+        with open(STATE_PATH, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    previous = state.get(os.path.abspath(out_dir), {})
+
+    options = {'minify': minify_files, 'strip_console': strip_console}
+    jobs = []
+    sources = {}
+    for src in sorted(graph):
+        if src == page:
+            rel = 'index.html'
+        elif page.startswith(partials.BUILD_DIR + os.sep):
+            rel = os.path.relpath(src, root)
+        else:
+            rel = os.path.relpath(src, site_root)
+        if rel.startswith('..'):
+            missing.append(rel)
+            continue
+        if rel in sources:
+            raise ValueError(f'{src} and {sources[rel]} would both be exported as {rel}')
+        sources[rel] = src
+        dest = os.path.join(out_dir, rel)
+        jobs.append((src, rel, dest, previous.get(rel), options))
+
+    os.makedirs(out_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(export_file, jobs))
+
+    # Drop files this exporter placed last time that the variant no longer uses
+    current = {result['rel'] for result in results}
+    removed = []
+    for rel in set(previous) - current:
+        for path in (os.path.join(out_dir, rel), os.path.join(out_dir, rel + '.gz')):
+            if os.path.exists(path):
+                os.unlink(path)
+        removed.append(rel)
+
+    entries = []
+    for result in sorted(results, key=lambda r: r['rel']):
+        gz_size = 0
+        if result['encodings']:
+            gz_size = os.path.getsize(os.path.join(out_dir, result['rel'] + '.gz'))
+        url_path = '/' + result['rel'].replace(os.sep, '/')
+        entries.append((url_path, result['out_size'], result['out_mtime'], result['type'],
+                        bytes.fromhex(result['out_hash']), result['encodings'], gz_size))
+    write_manifest(entries, os.path.join(out_dir, MANIFEST_NAME))
+
+    state[os.path.abspath(out_dir)] = {
+        result['rel']: {k: v for k, v in result.items() if k not in ('rel', 'action')}
+        for result in results}
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    with open(STATE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+
+    actions = {}
+    for result in results:
+        actions[result['action']] = actions.get(result['action'], 0) + 1
+    return {'page': page, 'files': len(results), 'actions': actions, 'removed': removed,
+            'missing': sorted(set(missing)),
+            'bytes': sum(result['out_size'] for result in results)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('variant', nargs='?', help='HTML file or templates page name')
+    parser.add_argument('--root', default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument('--out', default=DEPLOY_DIR)
+    parser.add_argument('--minify', action='store_true', help='minify HTML/CSS/JS (see minify.py)')
+    parser.add_argument('--strip-console', action='store_true')
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    parser.add_argument('--show', action='store_true', help='list the current manifest')
+    args = parser.parse_args(argv)
+
+    os.chdir(args.root)
+    if args.show:
+        manifest = Manifest(os.path.join(args.out, MANIFEST_NAME))
+        for entry in manifest:
+            encodings = ','.join(entry['encodings']) or '-'
+            print(f"{entry['size']:>9} {entry['etag']} {encodings:5} {entry['type']:24} {entry['path']}")
+        return 0
+    if not args.variant:
+        parser.error('a variant is required (or --show)')
+
+    started = time.perf_counter()
+    try:
+        summary = export(args.variant, args.out, args.minify, args.strip_console, args.jobs)
+    except FileNotFoundError as e:
+        print(f'❌ {e}', file=sys.stderr)
+        return 1
+    actions = ', '.join(f'{count} {action}' for action, count in sorted(summary['actions'].items()))
+    print(f"✅ Exported {summary['page']} -> {args.out}/index.html")
+    print(f"📦 {summary['files']} files ({summary['bytes'] // 1024}K): {actions}")
+    if summary['removed']:
+        print(f"🧹 Removed {len(summary['removed'])} files no longer referenced")
+    if summary['missing']:
+        print(f"⚠️  {len(summary['missing'])} referenced files not found:")
+        for path in summary['missing']:
+            print(f'   {path}')
+    print(f'🗂️  Manifest: {args.out}/{MANIFEST_NAME} in {time.perf_counter() - started:.2f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,735 @@
+#!/usr/bin/env python3
+"""
+Streaming minifier for the site's HTML (with inline <style>/<script>), CSS and JS.
+
+Files are read in CHUNK_SIZE pieces and written out as they are processed, so
+memory stays bounded by the largest single inline block rather than the file.
+The minification is deliberately conservative:
+
+  * HTML: comments are dropped (except conditional comments), whitespace runs
+    collapse to one space or newline, and tags are rewritten without the
+    indentation inside them. <pre>, <textarea> and elements styled with
+    `white-space: pre*` are copied verbatim. Attribute values are never touched.
+  * CSS: comments (except /*! ... */) and redundant whitespace are removed.
+  * JS: comments, indentation and redundant whitespace are removed; line breaks
+    are kept wherever automatic semicolon insertion could depend on them.
+    With --strip-console, console.log/debug/info/trace/... calls are removed
+    (console.warn and console.error stay).
+
+Results are cached under .build-cache/minify/ by content hash and options, and
+files are processed in parallel. --verify re-parses input and output and checks
+that both give the same DOM (elements, attributes, whitespace-normalized text,
+and the same CSS/JS tokens).
+
+--verify cannot check --strip-console: the input side is stripped too (the
+output is meant to differ by those calls), so only the minification is
+verified. Run a second pass without --strip-console to check that part, and
+review what stripping removed separately.
+
+    python3 minify.py [FILE ...] [--out build/min] [--strip-console] [--verify]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+CHUNK_SIZE = 64 * 1024
+CACHE_DIR = os.path.join('.build-cache', 'minify')
+OUT_DIR = os.path.join('build', 'min')
+VERSION = 3
+SKIP_DIRS = {'.git', '.build-cache', 'build', 'templates', 'node_modules', '__pycache__'}
+EXTENSIONS = {'.html': 'html', '.htm': 'html', '.css': 'css', '.js': 'js'}
+
+PRESERVE_TAGS = {'pre', 'textarea'}
+RAW_TAGS = {'script', 'style'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+             'meta', 'param', 'source', 'track', 'wbr'}
+JS_TYPES = {'', 'text/javascript', 'application/javascript', 'module', 'text/ecmascript'}
+CONSOLE_METHODS = {'log', 'debug', 'info', 'trace', 'dir', 'dirxml', 'table',
+                   'time', 'timeEnd', 'timeLog', 'group', 'groupCollapsed', 'groupEnd',
+                   'count', 'countReset', 'assert'}
+
+# HTML whitespace only: U+00A0 (&nbsp;) and friends are visible text
+HTML_SPACE = ' \t\n\r\f'
+WHITESPACE_RE = re.compile(f'[{HTML_SPACE}]+')
+PRE_STYLE_RE = re.compile(r'white-space\s*:\s*(pre|break-spaces)', re.IGNORECASE)
+# Same attribute syntax as html.parser, so broken markup survives unchanged
+ATTR_RE = re.compile(r'''([^\s/>][^\s/=>]*)(?:\s*=+\s*('[^']*'|"[^"]*"|(?!['"])[^>\s]*))?''')
+
+
+# ---------------------------------------------------------------------------
+# Tokenizers shared by the CSS and JS minifiers
+# ---------------------------------------------------------------------------
+
+class StreamTokenizer:
+    """Split chunked text into (kind, text) tokens.
+
+    A token that touches the end of the buffered text is held back until more
+    input arrives (or close() is called), so tokens never straddle chunks.
+    """
+
+    token_re = None
+
+    def __init__(self):
+        self.buffer = ''
+        self.previous = None
+
+    def classify(self, match):
+        return match.lastgroup
+
+    def feed(self, chunk, final=False):
+        self.buffer += chunk
+        position = 0
+        size = len(self.buffer)
+        while position < size:
+            match = self.match(position)
+            if match is None:
+                if not final:
+                    break
+                kind, end = 'other', size
+            else:
+                kind, end = self.classify(match), match.end()
+                if end == size and not final:
+                    break
+            token = (kind, self.buffer[position:end])
+            if kind not in ('space', 'comment'):
+                self.previous = token
+            yield token
+            position = end
+        self.buffer = self.buffer[position:]
+
+    def close(self):
+        return self.feed('', final=True)
+
+    def tokens(self, chunks):
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.close()
+
+
+class CSSTokenizer(StreamTokenizer):
+    token_re = re.compile(r'''
+        (?P<space>\s+)
+      | (?P<comment>/\*.*?\*/)
+      | (?P<string>"(?:[^"\\\n]|\\[\s\S])*"|'(?:[^'\\\n]|\\[\s\S])*')
+      | (?P<other>[^\s"'/]+|/(?!\*))
+    ''', re.VERBOSE | re.DOTALL)
+
+    def match(self, position):
+        return self.token_re.match(self.buffer, position)
+
+
+class JSTokenizer(StreamTokenizer):
+    token_re = re.compile(r'''
+        (?P<space>\s+)
+      | (?P<comment>//[^\n]*|/\*.*?\*/)
+      | (?P<string>"(?:[^"\\\n]|\\[\s\S])*"|'(?:[^'\\\n]|\\[\s\S])*'|`(?:[^`\\]|\\[\s\S])*`)
+      | (?P<name>[\w$]+)
+      | (?P<punct>[^\s\w$"'`])
+    ''', re.VERBOSE | re.DOTALL)
+    regex_re = re.compile(r'/(?![*/])(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*')
+    regex_after = set('(,=:[!&|?{};+-*%<>~^')
+    regex_keywords = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete',
+                      'void', 'throw', 'case', 'do', 'else', 'yield', 'await'}
+
+    def regex_allowed(self):
+        if self.previous is None:
+            return True
+        kind, text = self.previous
+        if kind == 'punct':
+            return text in self.regex_after or text == '}'
+        return kind == 'name' and text in self.regex_keywords
+
+    def match(self, position):
+        text = self.buffer
+        if text.startswith('/', position) and not text.startswith(('//', '/*'), position) \
+                and self.regex_allowed():
+            match = self.regex_re.match(text, position)
+            if match:
+                return _Match('regex', match.end())
+            if '\n' not in text[position:]:
+                return None  # possibly a regex cut off by the end of the chunk
+        match = self.token_re.match(text, position)
+        if match and match.lastgroup == 'punct' and (
+                match.group() in '"\'`' or text.startswith('/*', position)):
+            return None  # an unterminated string or comment: wait for the rest
+        return match
+
+
+class _Match:
+    """Stand-in for re.Match for tokens found outside token_re."""
+
+    def __init__(self, lastgroup, end):
+        self.lastgroup = lastgroup
+        self._end = end
+
+    def end(self):
+        return self._end
+
+
+# ---------------------------------------------------------------------------
+# CSS
+# ---------------------------------------------------------------------------
+
+CSS_TIGHT_AFTER = set('{};,:>(')
+CSS_TIGHT_BEFORE = set('{};,>)')
+
+
+def minify_css_tokens(tokens):
+    """Yield minified CSS text from CSS tokens."""
+    last = ''
+    pending_space = False
+    pending_semicolon = False
+    for kind, text in tokens:
+        if kind == 'comment':
+            if not text.startswith('/*!'):
+                pending_space = pending_space or bool(last)
+                continue
+        if kind == 'space':
+            pending_space = bool(last)
+            continue
+        first = text[0]
+        if pending_semicolon:
+            pending_semicolon = False
+            if first != '}':
+                yield ';'
+                last = ';'
+        if pending_space and last not in CSS_TIGHT_AFTER and first not in CSS_TIGHT_BEFORE:
+            yield ' '
+        pending_space = False
+        if kind == 'other':
+            text = text.replace(';}', '}')
+        if text.endswith(';') and kind == 'other':
+            # Hold a trailing ';' back in case the next token is '}'
+            text = text[:-1]
+            pending_semicolon = True
+            if not text:
+                continue
+        yield text
+        last = text[-1]
+    if pending_semicolon:
+        yield ';'
+
+
+def minify_css(text):
+    return ''.join(minify_css_tokens(CSSTokenizer().tokens([text])))
+
+
+# ---------------------------------------------------------------------------
+# JS
+# ---------------------------------------------------------------------------
+
+JS_TIGHT = set('{}()[];,:=<>!?&|%^~')
+JS_NEWLINE_DROP_AFTER = set('{;,')
+JS_NEWLINE_DROP_BEFORE = set('}')
+
+
+def statement_ends(token, newline):
+    """Whether a statement ends before token (the next significant JS token)."""
+    if token is None or token in (('punct', ';'), ('punct', '}')):
+        return True
+    if not newline:
+        return False
+    # After a line break only a token that cannot continue the expression
+    # ends it by ASI; '(', '[', '.', operators and `tagged` templates continue
+    kind, text = token
+    if kind == 'name':
+        return text not in ('in', 'instanceof', 'of')
+    return kind == 'string' and not text.startswith('`')
+
+
+def strip_console_calls(tokens):
+    """Remove console.log(...)-style calls from a JS token stream.
+
+    A call that is a whole statement (it starts one and is followed by ';',
+    '}', the end, or a line break that ends it) is dropped with its ';'.
+    Anywhere else (`x && console.log(y)`, `console.log(a), b()`) it becomes
+    `void 0` so the surrounding code keeps its shape.
+    """
+    tokens = iter(tokens)
+    replay = []
+    previous = None
+
+    def pull():
+        return replay.pop(0) if replay else next(tokens, None)
+
+    while True:
+        token = pull()
+        if token is None:
+            return
+        if token != ('name', 'console'):
+            if token[0] not in ('space', 'comment'):
+                previous = token
+            yield token
+            continue
+
+        seen, significant = [], []
+        while len(significant) < 3:
+            following = pull()
+            if following is None:
+                break
+            seen.append(following)
+            if following[0] not in ('space', 'comment'):
+                significant.append(following)
+        if len(significant) < 3 or significant[0] != ('punct', '.') \
+                or significant[1][0] != 'name' or significant[1][1] not in CONSOLE_METHODS \
+                or significant[2] != ('punct', '('):
+            replay[:0] = seen
+            previous = token
+            yield token
+            continue
+
+        depth = 1
+        while depth:
+            following = pull()
+            if following is None:
+                return
+            if following == ('punct', '('):
+                depth += 1
+            elif following == ('punct', ')'):
+                depth -= 1
+
+        seen = []
+        following = pull()
+        while following is not None and following[0] in ('space', 'comment'):
+            seen.append(following)
+            following = pull()
+        newline = any('\n' in text or text.startswith('//') for _, text in seen)
+        statement_start = previous is None or previous in (
+            ('punct', ';'), ('punct', '{'), ('punct', '}'))
+        if statement_start and statement_ends(following, newline):
+            if following != ('punct', ';'):
+                replay[:0] = seen + ([following] if following is not None else [])
+        else:
+            previous = ('name', '0')
+            yield from (('name', 'void'), ('space', ' '), ('name', '0'))
+            replay[:0] = seen + ([following] if following is not None else [])
+
+
+def minify_js_tokens(tokens):
+    """Yield minified JS text from JS tokens."""
+    last = ''
+    pending = None
+    for kind, text in tokens:
+        if kind == 'comment':
+            if text.startswith('/*!'):
+                kind = 'keep'
+            else:
+                has_newline = '\n' in text or text.startswith('//')
+                pending = '\n' if has_newline or pending == '\n' else (pending or ' ')
+                continue
+        if kind == 'space':
+            pending = '\n' if '\n' in text or pending == '\n' else (pending or ' ')
+            continue
+        first = text[0]
+        if pending and last:
+            if pending == '\n':
+                if last not in JS_NEWLINE_DROP_AFTER and first not in JS_NEWLINE_DROP_BEFORE:
+                    yield '\n'
+            elif not (last in JS_TIGHT or first in JS_TIGHT) or (last in '+-' and first in '+-'):
+                yield ' '
+        pending = None
+        yield text
+        last = text[-1]
+
+
+def js_tokens(chunks, strip_console=False):
+    tokens = JSTokenizer().tokens(chunks)
+    return strip_console_calls(tokens) if strip_console else tokens
+
+
+def minify_js(text, strip_console=False):
+    return ''.join(minify_js_tokens(js_tokens([text], strip_console)))
+
+
+def significant_tokens(tokens):
+    """Tokens that carry meaning: what --verify compares for JS."""
+    return [text for kind, text in tokens
+            if kind not in ('space', 'comment') or text.startswith('/*!')]
+
+
+CSS_PIECE_RE = re.compile(r'[^\s{}()\[\];:,>+~*=\'"]+|\S')
+
+
+def css_signature(chunks):
+    """Words and punctuation of a stylesheet, ignoring ';' before '}'."""
+    pieces = []
+    for kind, text in CSSTokenizer().tokens(chunks):
+        if kind == 'string':
+            pieces.append(text)
+        elif kind != 'space' and (kind != 'comment' or text.startswith('/*!')):
+            pieces.extend(CSS_PIECE_RE.findall(text))
+    return [piece for index, piece in enumerate(pieces)
+            if not (piece == ';' and pieces[index + 1:index + 2] == ['}'])]
+
+
+# ---------------------------------------------------------------------------
+# HTML
+# ---------------------------------------------------------------------------
+
+def rebuild_tag(raw):
+    """Rewrite a raw start tag with single spaces between its attributes."""
+    match = re.match(r'<\s*([^\s/>]+)', raw)
+    name = match.group(1)
+    rest = raw[match.end():].rstrip('>')
+    self_closing = re.search(r'(?:^|[\s"\'])/\s*$', rest) is not None
+    if self_closing:
+        rest = rest.rstrip()[:-1]
+    parts = [f'<{name}']
+    for attr in ATTR_RE.finditer(rest):
+        key, value = attr.group(1), attr.group(2)
+        parts.append(f' {key}={value}' if value is not None else f' {key}')
+    return ''.join(parts) + ('/>' if self_closing else '>')
+
+
+def escape_text(text):
+    """Re-escape decoded text so it parses back to the same characters."""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('\xa0', '&nbsp;')
+
+
+def collapse(text):
+    """Collapse whitespace runs, keeping a newline if the run had one."""
+    return WHITESPACE_RE.sub(lambda m: '\n' if '\n' in m.group() else ' ', text)
+
+
+class HTMLMinifier(HTMLParser):
+    """Feed HTML in chunks; minified output goes to write() as it is produced."""
+
+    def __init__(self, write, strip_console=False):
+        # Character references arrive decoded in handle_data (as browsers
+        # decode them, with or without the ';') and are re-escaped on output
+        super().__init__(convert_charrefs=True)
+        self.write = write
+        self.strip_console = strip_console
+        self.stack = []
+        self.preserve = 0
+        self.raw_tag = None
+        self.raw_kind = None
+        self.raw_parts = []
+        self.trailing_space = True
+
+    def emit(self, text, is_text=False):
+        if not text:
+            return
+        if is_text and self.trailing_space and not self.preserve:
+            text = text.lstrip(' \n') if text[0] in ' \n' else text
+            if not text:
+                return
+        self.write(text)
+        self.trailing_space = text[-1] in ' \n'
+
+    def handle_starttag(self, tag, attrs):
+        raw = self.get_starttag_text()
+        preserves = tag in PRESERVE_TAGS or any(
+            name == 'style' and value and PRE_STYLE_RE.search(value) for name, value in attrs)
+        self.emit(raw if self.preserve else rebuild_tag(raw))
+        if tag in RAW_TAGS:
+            self.raw_tag = tag
+            self.raw_parts = []
+            kind = dict(attrs).get('type', '') or ''
+            if tag == 'style':
+                self.raw_kind = 'css'
+            elif kind.lower() in JS_TYPES:
+                self.raw_kind = 'js'
+            elif kind.lower() in ('application/json', 'application/ld+json'):
+                self.raw_kind = 'json'
+            else:
+                self.raw_kind = None
+            return
+        if tag not in VOID_TAGS:
+            self.stack.append((tag, preserves))
+            self.preserve += preserves
+
+    def handle_startendtag(self, tag, attrs):
+        raw = self.get_starttag_text()
+        self.emit(raw if self.preserve else rebuild_tag(raw))
+
+    def handle_endtag(self, tag):
+        if self.raw_tag == tag:
+            self.emit(self.minify_raw(''.join(self.raw_parts)))
+            self.raw_tag = None
+            self.raw_parts = []
+        elif any(open_tag == tag for open_tag, _ in self.stack):
+            # Pop up to the matching start tag, as the browser would
+            while self.stack:
+                open_tag, preserves = self.stack.pop()
+                self.preserve -= preserves
+                if open_tag == tag:
+                    break
+        self.emit(f'</{tag}>')
+
+    def minify_raw(self, text):
+        try:
+            if self.raw_kind == 'css':
+                return minify_css(text)
+            if self.raw_kind == 'js':
+                return minify_js(text, self.strip_console)
+            if self.raw_kind == 'json':
+                return json.dumps(json.loads(text), separators=(',', ':'), ensure_ascii=False)
+        except ValueError:
+            pass
+        return text
+
+    def handle_data(self, data):
+        if self.raw_tag:
+            self.raw_parts.append(data)
+        elif self.preserve:
+            self.emit(escape_text(data), is_text=True)
+        else:
+            self.emit(escape_text(collapse(data)), is_text=True)
+
+    def handle_comment(self, data):
+        if self.preserve or data.startswith('[if') or data.startswith('<![endif'):
+            self.emit(f'<!--{data}-->')
+
+    def handle_decl(self, decl):
+        self.emit(f'<!{decl}>')
+
+    def handle_pi(self, data):
+        self.emit(f'<?{data}>')
+
+    def unknown_decl(self, data):
+        self.emit(f'<![{data}]>')
+
+    def close(self):
+        super().close()
+        if self.raw_tag:
+            # Unclosed <script>/<style> at end of file: keep it as it was
+            self.emit(''.join(self.raw_parts))
+            self.raw_tag = None
+
+
+# ---------------------------------------------------------------------------
+# Verification: do input and output parse to the same DOM?
+# ---------------------------------------------------------------------------
+
+class DOMSignature(HTMLParser):
+    """A flat, comparable description of a document's DOM."""
+
+    def __init__(self, strip_console=False):
+        super().__init__(convert_charrefs=True)
+        self.strip_console = strip_console
+        self.events = []
+        self.text = []
+        self.preserve = []
+        self.raw_tag = None
+        self.raw_kind = None
+
+    def preserving(self):
+        return any(preserves for _, preserves in self.preserve)
+
+    def flush_text(self):
+        if self.text:
+            text = ''.join(self.text)
+            if not self.preserving():
+                text = WHITESPACE_RE.sub(' ', text)
+                if text == ' ':
+                    text = ''
+            if text:
+                self.events.append(('text', text.strip(HTML_SPACE) if not self.preserving() else text))
+            self.text = []
+
+    def handle_starttag(self, tag, attrs):
+        self.flush_text()
+        self.events.append(('start', tag, tuple(attrs)))
+        if tag in RAW_TAGS:
+            self.raw_tag = tag
+            kind = (dict(attrs).get('type') or '').lower()
+            self.raw_kind = 'css' if tag == 'style' else 'js' if kind in JS_TYPES else None
+        elif tag not in VOID_TAGS:
+            self.preserve.append((tag, tag in PRESERVE_TAGS or any(
+                name == 'style' and value and PRE_STYLE_RE.search(value) for name, value in attrs)))
+
+    def handle_startendtag(self, tag, attrs):
+        self.flush_text()
+        self.events.append(('start', tag, tuple(attrs)))
+
+    def handle_endtag(self, tag):
+        if self.raw_tag == tag:
+            text = ''.join(self.text)
+            self.text = []
+            if self.raw_kind == 'css':
+                self.events.append(('css', tuple(css_signature([text]))))
+            elif self.raw_kind == 'js':
+                tokens = js_tokens([text], self.strip_console)
+                self.events.append(('js', tuple(significant_tokens(tokens))))
+            elif text.strip():
+                self.events.append(('raw', text.strip()))
+            self.raw_tag = None
+        else:
+            self.flush_text()
+            if any(open_tag == tag for open_tag, _ in self.preserve):
+                while self.preserve.pop()[0] != tag:
+                    pass
+        self.events.append(('end', tag))
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+    def close(self):
+        super().close()
+        self.flush_text()
+
+
+def dom_signature(path, kind, strip_console=False):
+    with open(path, encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    if kind == 'css':
+        return css_signature([text])
+    if kind == 'js':
+        return significant_tokens(js_tokens([text], strip_console))
+    parser = DOMSignature(strip_console)
+    parser.feed(text)
+    parser.close()
+    return parser.events
+
+
+def first_difference(a, b):
+    for index, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return f'#{index}: {str(x)[:120]!r} != {str(y)[:120]!r}'
+    if len(a) != len(b):
+        return f'length {len(a)} != {len(b)}'
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Files
+# ---------------------------------------------------------------------------
+
+def read_chunks(path):
+    with open(path, encoding='utf-8', errors='replace', newline='') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def minify_stream(kind, chunks, write, strip_console=False):
+    if kind == 'html':
+        parser = HTMLMinifier(write, strip_console)
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.close()
+    elif kind == 'css':
+        for text in minify_css_tokens(CSSTokenizer().tokens(chunks)):
+            write(text)
+    else:
+        for text in minify_js_tokens(js_tokens(chunks, strip_console)):
+            write(text)
+
+
+def file_hash(path, options):
+    digest = hashlib.sha256(f'{VERSION}:{options}:'.encode())
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def minify_file(path, out_path, strip_console=False, verify=False, cache_dir=CACHE_DIR):
+    """Minify one file; returns a report dict. Safe to run in a worker process."""
+    kind = EXTENSIONS[os.path.splitext(path)[1].lower()]
+    started = time.perf_counter()
+    key = file_hash(path, f'kind={kind}:strip_console={strip_console}')
+    cached = os.path.join(cache_dir, key[:2], key) if cache_dir else None
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+
+    hit = bool(cached and os.path.exists(cached))
+    if hit:
+        shutil.copyfile(cached, out_path)
+    else:
+        tmp = f'{out_path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8', newline='') as out:
+            minify_stream(kind, read_chunks(path), out.write, strip_console)
+        os.replace(tmp, out_path)
+        if cached:
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            shutil.copyfile(out_path, f'{cached}.{os.getpid()}.tmp')
+            os.replace(f'{cached}.{os.getpid()}.tmp', cached)
+
+    report = {'path': path, 'kind': kind, 'cached': hit,
+              'before': os.path.getsize(path), 'after': os.path.getsize(out_path),
+              'seconds': time.perf_counter() - started}
+    if verify:
+        report['difference'] = first_difference(
+            dom_signature(path, kind, strip_console), dom_signature(out_path, kind))
+        report['verified'] = report['difference'] is None
+    return report
+
+
+def _minify_job(args):
+    return minify_file(*args)
+
+
+def iter_targets(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() in EXTENSIONS:
+                yield os.path.relpath(os.path.join(dirpath, filename), root)
+
+
+def minify_files(paths, out_dir=OUT_DIR, strip_console=False, verify=False,
+                 cache_dir=CACHE_DIR, workers=None):
+    """Minify paths into out_dir (mirroring their relative paths) in parallel."""
+    jobs = [(path, os.path.join(out_dir, path), strip_console, verify, cache_dir)
+            for path in paths]
+    if workers == 1 or len(jobs) < 2:
+        return [minify_file(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_minify_job, jobs))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', help='default: every .html/.css/.js in the tree')
+    parser.add_argument('--root', default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument('--out', default=OUT_DIR)
+    parser.add_argument('--strip-console', action='store_true')
+    parser.add_argument('--verify', action='store_true',
+                        help='check DOM-equivalence of the output (not of --strip-console)')
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    os.chdir(args.root)
+    paths = args.files or list(iter_targets('.'))
+    started = time.perf_counter()
+    reports = minify_files(paths, args.out, args.strip_console, args.verify,
+                           None if args.no_cache else CACHE_DIR, args.jobs)
+
+    if args.verify and args.strip_console:
+        print('⚠️  --verify compares stripped input with the output; console stripping '
+              'itself is not verified (re-run without --strip-console to check the rest)')
+    failed = 0
+    for report in reports:
+        saved = report['before'] - report['after']
+        percent = 100 * saved / report['before'] if report['before'] else 0
+        status = ''
+        if args.verify:
+            status = '✅' if report['verified'] else f"❌ {report['difference']}"
+            failed += not report['verified']
+        print(f"{report['before'] / 1024:8.1f}K -> {report['after'] / 1024:8.1f}K "
+              f"{percent:5.1f}% {'cached' if report['cached'] else '      '} "
+              f"{report['path']} {status}")
+    before = sum(r['before'] for r in reports)
+    after = sum(r['after'] for r in reports)
+    print(f'📦 {len(reports)} files: {before / 1024:.0f}K -> {after / 1024:.0f}K '
+          f'({100 * (before - after) / before if before else 0:.1f}% saved) '
+          f'in {time.perf_counter() - started:.2f}s -> {args.out}/')
+    if failed:
+        print(f'❌ {failed} file(s) failed verification', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Section partials for the Empty Nest pages.
+
+Every top-level HTML file in this folder is a hand-copied variant of the same
+page that differs in a few <section> blocks. Instead of keeping a full copy per
+variant, a page is described as a layout plus an ordered list of partials:
+
+    templates/
+        layouts/<name>.html    the document around the sections, with a
+                               {{ sections }} slot where they go
+        partials/<name>.html   one top-level <section> each (plus the comment
+                               that introduces it)
+        pages/<page>.json      {"layout": "...", "sections": [...], "vars": {}}
+
+`{{ name }}` placeholders in layouts and partials are filled from the page's
+"vars"; unknown placeholders are left alone.
+
+Compiled fragments are cached by the hash of their source and the variables
+they use, in memory and under .build-cache/fragments/, so rebuilding or
+serving a variant only renders the partials that changed.
+
+    python3 partials.py split [FILE ...]   # build templates/ from the variants
+    python3 partials.py build [PAGE ...]   # write build/<page>.html
+    python3 partials.py bench              # compare with copy-per-variant
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+TEMPLATES_DIR = 'templates'
+BUILD_DIR = 'build'
+CACHE_DIR = os.path.join('.build-cache', 'fragments')
+SECTIONS_SLOT = '{{ sections }}'
+
+SECTION_TAG_RE = re.compile(r'<section\b[^>]*>|</section\s*>', re.IGNORECASE)
+ID_RE = re.compile(r'\bid\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+CLASS_RE = re.compile(r'\bclass\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+VAR_RE = re.compile(r'\{\{\s*([A-Za-z_][\w-]*)\s*\}\}')
+NAME_SAFE_RE = re.compile(r'[^A-Za-z0-9_-]+')
+
+
+def section_name(open_tag, index):
+    """Name a section by its id, else its first class, else its position."""
+    match = ID_RE.search(open_tag)
+    if match:
+        return match.group(1)
+    match = CLASS_RE.search(open_tag)
+    if match and match.group(1).split():
+        return match.group(1).split()[0]
+    return f'section-{index + 1}'
+
+
+def iter_sections(text):
+    """Yield (name, start, end) for every closed top-level <section> in text."""
+    depth = 0
+    start = open_tag = None
+    index = 0
+    for match in SECTION_TAG_RE.finditer(text):
+        if match.group().startswith('</'):
+            if depth == 0:
+                continue
+            depth -= 1
+            if depth == 0:
+                yield section_name(open_tag, index), start, match.end()
+                index += 1
+        else:
+            if depth == 0:
+                start, open_tag = match.start(), match.group()
+            depth += 1
+
+
+def split_document(text):
+    """Split a document into (head, [(name, chunk), ...], tail).
+
+    Each chunk after the first also carries the markup between it and the
+    previous section (usually a `<!-- Section -->` comment), so joining
+    head, the chunks and tail gives back the original text.
+    """
+    sections = list(iter_sections(text))
+    if not sections:
+        return text, [], ''
+    head = text[:sections[0][1]]
+    chunks = []
+    previous_end = sections[0][1]
+    for name, _, end in sections:
+        chunks.append((name, text[previous_end:end]))
+        previous_end = end
+    return head, chunks, text[previous_end:]
+
+
+def is_fragment(text):
+    """True for files like new_celebrations_section.html with no <html> shell."""
+    return re.search(r'<html\b', text, re.IGNORECASE) is None
+
+
+def content_hash(data):
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def used_vars(source, variables):
+    """The subset of variables a source actually references."""
+    return {name: variables[name] for name in sorted(set(VAR_RE.findall(source)))
+            if name in variables}
+
+
+def compile_fragment(source, variables):
+    """Render one layout piece or partial to bytes."""
+    def substitute(match):
+        value = variables.get(match.group(1))
+        return match.group(0) if value is None else str(value)
+    return VAR_RE.sub(substitute, source).encode('utf-8')
+
+
+class FragmentCache:
+    """Compiled fragments keyed by the hash of their source and variables.
+
+    Identical partials used by several pages compile to the same bytes object,
+    so a server holding every variant only pays for the unique fragments.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.fragments = {}
+        self.rendered = 0
+
+    def key(self, source, variables):
+        used = json.dumps(used_vars(source, variables), sort_keys=True)
+        return content_hash(source + '\0' + used)
+
+    def get(self, source, variables):
+        key = self.key(source, variables)
+        fragment = self.fragments.get(key)
+        if fragment is not None:
+            return key, fragment
+
+        path = os.path.join(self.cache_dir, key[:2], key) if self.cache_dir else None
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                fragment = f.read()
+        else:
+            fragment = compile_fragment(source, variables)
+            self.rendered += 1
+            if path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f'{path}.{os.getpid()}.tmp'
+                with open(tmp, 'wb') as f:
+                    f.write(fragment)
+                os.replace(tmp, path)
+        self.fragments[key] = fragment
+        return key, fragment
+
+    def retain(self, keys):
+        """Drop in-memory fragments no longer referenced by any page."""
+        keys = set(keys)
+        for key in list(self.fragments):
+            if key not in keys:
+                del self.fragments[key]
+
+    def size(self):
+        return sum(len(fragment) for fragment in self.fragments.values())
+
+
+class Site:
+    """The page specs, layouts and partials under one templates directory."""
+
+    def __init__(self, root=TEMPLATES_DIR, cache=None):
+        self.root = root
+        self.cache = cache if cache is not None else FragmentCache()
+        self.pages = {}
+        self._stamp = None
+        self.error = None
+
+    def _path(self, kind, name, ext='.html'):
+        return os.path.join(self.root, kind, name + ext)
+
+    def _read(self, path):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def page_names(self):
+        pattern = os.path.join(self.root, 'pages', '*.json')
+        return sorted(os.path.splitext(os.path.basename(p))[0] for p in glob.glob(pattern))
+
+    def load_spec(self, name):
+        with open(self._path('pages', name, '.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    def compile_page(self, name):
+        """Return the page as a list of (key, bytes) fragments."""
+        compiled = self.pages.get(name)
+        if compiled is None:
+            compiled = self.pages[name] = self._compile(name)
+        return compiled
+
+    def _compile(self, name):
+        spec = self.load_spec(name)
+        variables = spec.get('vars', {})
+        layout = self._read(self._path('layouts', spec['layout']))
+        if SECTIONS_SLOT not in layout:
+            raise ValueError(f"layout {spec['layout']!r} has no {SECTIONS_SLOT} slot")
+        head, tail = layout.split(SECTIONS_SLOT, 1)
+
+        compiled = [self.cache.get(head, variables)]
+        for partial in spec.get('sections', []):
+            source = self._read(self._path('partials', partial))
+            compiled.append(self.cache.get(source, variables))
+        compiled.append(self.cache.get(tail, variables))
+        return compiled
+
+    def refresh(self):
+        """Forget compiled pages if anything under the templates dir changed.
+
+        Unchanged partials are still served from the fragment cache; only the
+        ones whose source changed get rendered again. If the templates do not
+        compile (a missing partial, a spec saved halfway), the previous pages
+        stay in place and the next call tries again.
+        """
+        stamp = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stamp.append((path, os.stat(path).st_mtime_ns))
+                except OSError:
+                    pass  # removed since the walk listed it (editor swap files)
+        stamp.sort()
+        if stamp == self._stamp:
+            return False
+        try:
+            pages = {name: self._compile(name) for name in self.page_names()}
+        except (OSError, ValueError, KeyError) as e:
+            error = f'{type(e).__name__}: {e}'
+            if error != self.error:
+                print(f'❌ templates not reloaded, keeping previous pages: {error}', file=sys.stderr)
+                self.error = error
+            return False
+        self.pages = pages
+        self._stamp = stamp
+        self.error = None
+        self.cache.retain(key for fragments in pages.values() for key, _ in fragments)
+        return True
+
+
+def page_etag(fragments):
+    digest = hashlib.sha256()
+    for key, _ in fragments:
+        digest.update(key.encode('ascii'))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def page_length(fragments):
+    return sum(len(fragment) for _, fragment in fragments)
+
+
+def write_page(fragments, path):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        for _, fragment in fragments:
+            f.write(fragment)
+    os.replace(tmp, path)
+
+
+def build(site, names, out_dir=BUILD_DIR):
+    """Write each page to out_dir, skipping pages whose fragments are unchanged.
+
+    Returns {page: written?}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, '.etags.json')
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            etags = json.load(f)
+    except (OSError, ValueError):
+        etags = {}
+
+    results = {}
+    for name in names:
+        fragments = site.compile_page(name)
+        etag = page_etag(fragments)
+        path = os.path.join(out_dir, name + '.html')
+        if etags.get(name) == etag and os.path.exists(path):
+            results[name] = False
+            continue
+        write_page(fragments, path)
+        etags[name] = etag
+        results[name] = True
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(etags, f, indent=2, sort_keys=True)
+    return results
+
+
+def split(files, root=TEMPLATES_DIR):
+    """Turn hand-copied variants into layouts, partials and page specs.
+
+    Identical sections across files become a single partial. Files without an
+    <html> shell (new_celebrations_section.html) only contribute partials.
+    Returns {page: spec}.
+    """
+    for kind in ('layouts', 'partials', 'pages'):
+        os.makedirs(os.path.join(root, kind), exist_ok=True)
+
+    def store(kind, stem, text):
+        name = f'{NAME_SAFE_RE.sub("-", stem).strip("-")}--{content_hash(text)[:8]}'
+        path = os.path.join(root, kind, name + '.html')
+        if not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return name
+
+    specs = {}
+    for filename in files:
+        with open(filename, encoding='utf-8') as f:
+            text = f.read()
+        head, chunks, tail = split_document(text)
+        sections = [store('partials', name, chunk) for name, chunk in chunks]
+        if is_fragment(text):
+            continue
+
+        page = NAME_SAFE_RE.sub('-', os.path.splitext(filename)[0]).strip('-')
+        layout = store('layouts', 'layout', head + SECTIONS_SLOT + tail)
+        spec = {'source': filename, 'layout': layout, 'sections': sections, 'vars': {}}
+        with open(os.path.join(root, 'pages', page + '.json'), 'w', encoding='utf-8') as f:
+            json.dump(spec, f, indent=2)
+            f.write('\n')
+        specs[page] = spec
+    return specs
+
+
+def default_variants():
+    """Every top-level .html file, plus the candidates in empty-nest-website/."""
+    files = sorted(glob.glob('*.html'))
+    files += sorted(glob.glob(os.path.join('empty-nest-website', '*.html')))
+    return files
+
+
+def bench(site, names):
+    """Build time and retained memory: partials vs one full copy per variant."""
+    results = []
+    work = tempfile.mkdtemp(prefix='partials-bench-')
+    try:
+        # Work on a copy so the edit below never touches the real templates
+        # (a running serve_site.py would recompile on the mtime change).
+        root = os.path.join(work, 'templates')
+        shutil.copytree(site.root, root)
+
+        # Copy-per-variant: every full document is read, held and copied.
+        reference = os.path.join(work, 'reference')
+        build(Site(root, FragmentCache(None)), names, reference)
+        copies = os.path.join(work, 'copies')
+        os.makedirs(copies)
+        tracemalloc.start()
+        started = time.perf_counter()
+        held = {}
+        for name in names:
+            src = os.path.join(reference, name + '.html')
+            with open(src, 'rb') as f:
+                held[name] = f.read()
+            shutil.copyfile(src, os.path.join(copies, name + '.html'))
+        elapsed = time.perf_counter() - started
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append(('copy per variant', elapsed, current, peak, len(names)))
+        del held
+
+        # Partials: first with an empty on-disk cache, then with it populated.
+        cache_dir = os.path.join(work, 'cache')
+        for label, out in (('partials (cold cache)', 'cold'), ('partials (warm cache)', 'warm')):
+            tracemalloc.start()
+            started = time.perf_counter()
+            fresh = Site(root, FragmentCache(cache_dir))
+            build(fresh, names, os.path.join(work, out))
+            elapsed = time.perf_counter() - started
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append((label, elapsed, current, peak, fresh.cache.rendered))
+            del fresh
+
+        # Rebuild after an edit to one partial: only that partial renders again.
+        warm = Site(root, FragmentCache(cache_dir))
+        build(warm, names, os.path.join(work, 'edit'))
+        spec = warm.load_spec(names[0])
+        if spec.get('sections'):
+            path = warm._path('partials', spec['sections'][0])
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write('\n')
+            started = time.perf_counter()
+            warm.pages.clear()
+            before = warm.cache.rendered
+            build(warm, names, os.path.join(work, 'edit'))
+            elapsed = time.perf_counter() - started
+            results.append(('partials (one partial edited)', elapsed,
+                            warm.cache.size(), warm.cache.size(),
+                            warm.cache.rendered - before))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--root', default=os.path.dirname(os.path.abspath(__file__)),
+                        help='webapp directory (default: next to this script)')
+    parser.add_argument('--templates', default=TEMPLATES_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    split_cmd = commands.add_parser('split', help='create templates/ from existing variants')
+    split_cmd.add_argument('files', nargs='*')
+    build_cmd = commands.add_parser('build', help='render pages into build/')
+    build_cmd.add_argument('pages', nargs='*')
+    build_cmd.add_argument('--out', default=BUILD_DIR)
+    bench_cmd = commands.add_parser('bench', help='compare against copy-per-variant')
+    bench_cmd.add_argument('pages', nargs='*')
+    args = parser.parse_args(argv)
+
+    os.chdir(args.root)
+    if args.command == 'split':
+        specs = split(args.files or default_variants(), args.templates)
+        partials = {p for spec in specs.values() for p in spec['sections']}
+        print(f'✅ {len(specs)} pages, {len(partials)} unique partials in {args.templates}/')
+        return 0
+
+    site = Site(args.templates)
+    names = getattr(args, 'pages', None) or site.page_names()
+    if not names:
+        print(f'❌ No pages in {args.templates}/pages/ - run `split` first', file=sys.stderr)
+        return 1
+
+    if args.command == 'build':
+        results = build(site, names, args.out)
+        for name, written in results.items():
+            print(f"{'✅ built  ' if written else '   skipped'} {name}.html")
+        print(f'🧩 {site.cache.rendered} fragments rendered, '
+              f'{len(site.cache.fragments)} in memory ({site.cache.size() / 1024:.0f} KB)')
+    elif args.command == 'bench':
+        print(f"{'approach':32} {'time':>9} {'retained':>10} {'peak':>10} {'renders':>8}")
+        for label, elapsed, current, peak, rendered in bench(site, names):
+            print(f'{label:32} {elapsed * 1000:7.1f}ms {current / 1024:8.0f}KB '
+                  f'{peak / 1024:8.0f}KB {rendered:8d}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
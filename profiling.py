@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+On-demand profiling for the http.server handlers (serve_site.py, cors_server.py).
+
+Nothing here runs unless a server calls install(), which the servers only do
+when EMPTYNEST_PROFILING=1 is set. Even then the handler runs its original
+methods until profiling is switched on:
+
+  * SIGUSR1, or GET /__admin/profile?seconds=N (localhost only, cross-site
+    browser requests refused), samples every thread's stack for N seconds and
+    writes collapsed stacks ("thread;file:func;file:func count" lines, ready
+    for flamegraph.pl or speedscope) to the output directory.
+  * While a profile runs (or after GET /__admin/timings?rate=R&seconds=N), a
+    fraction R of requests record how long each phase of the handler chain
+    took: do_GET -> send_head -> end_headers -> copyfile -> log_message.
+    The timing wrappers are added to the handler class only for that window
+    and removed afterwards, so the methods are the originals again.
+  * SIGUSR2, or GET /__admin/memory, takes a tracemalloc snapshot and reports
+    the biggest growth since the previous one (the first call starts tracing).
+
+tests/test_profiling.py checks that idle profiling leaves the handler as it was.
+"""
+import collections
+import functools
+import http.server
+import json
+import os
+import random
+import signal
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from urllib.parse import urlsplit, parse_qs
+
+ADMIN_PREFIX = '/__admin/'
+PHASES = ('do_GET', 'send_head', 'end_headers', 'copyfile', 'log_message', 'send_page')
+OUTPUT_DIR = os.path.join(tempfile.gettempdir(), 'empty-nest-profiles')
+DEFAULT_SECONDS = 30
+DEFAULT_INTERVAL = 0.005
+DEFAULT_RATE = 0.1
+MEMORY_FRAMES = 10
+MEMORY_TOP = 25
+LOCALHOST = {'127.0.0.1', '::1', '::ffff:127.0.0.1'}
+
+
+def take_snapshot():
+    """A tracemalloc snapshot without tracemalloc's and the importer's own traces."""
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+
+
+class Sampler(threading.Thread):
+    """Samples every other thread's stack until stopped or out of time."""
+
+    def __init__(self, seconds, interval, path):
+        super().__init__(name='profiling-sampler', daemon=True)
+        self.seconds = seconds
+        self.interval = interval
+        self.path = path
+        self.counts = collections.Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        deadline = time.monotonic() + self.seconds
+        while not self.stopped.is_set() and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                    frame = frame.f_back
+                stack.append(names.get(ident, f'thread-{ident}'))
+                self.counts[';'.join(reversed(stack))] += 1
+            self.samples += 1
+            self.stopped.wait(self.interval)
+        self.write()
+
+    def write(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f'{stack} {count}\n')
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class PhaseTimings:
+    """Per-phase totals for the sampled requests."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.phases = {}
+
+    def record(self, timings):
+        with self.lock:
+            self.requests += 1
+            for name, elapsed in timings.items():
+                count, total, worst = self.phases.get(name, (0, 0.0, 0.0))
+                self.phases[name] = (count + 1, total + elapsed, max(worst, elapsed))
+
+    def report(self):
+        with self.lock:
+            return {'sampled_requests': self.requests, 'phases': {
+                name: {'count': count, 'total_ms': round(total * 1000, 3),
+                       'mean_ms': round(total * 1000 / count, 3), 'max_ms': round(worst * 1000, 3)}
+                for name, (count, total, worst) in self.phases.items()}}
+
+
+class Profiling:
+    """Profiling state for one handler class."""
+
+    def __init__(self, handler_class, output_dir=OUTPUT_DIR):
+        self.handler_class = handler_class
+        self.output_dir = output_dir
+        self.sampler = None
+        self.last_profile = None
+        self.rate = 0.0
+        self.originals = {}
+        self.timings = PhaseTimings()
+        self.timings_timer = None
+        self.snapshot = None
+        self.lock = threading.Lock()
+
+    # -- phase timings ------------------------------------------------------
+
+    def timing_enabled(self):
+        return bool(self.originals)
+
+    def enable_timings(self, rate=DEFAULT_RATE, seconds=None):
+        """Wrap the handler's phase methods; sampled requests get timed."""
+        with self.lock:
+            self.rate = rate
+            if not self.originals:
+                self.timings.reset()
+                for name in PHASES:
+                    if not hasattr(self.handler_class, name):
+                        continue
+                    own = self.handler_class.__dict__.get(name)
+                    self.originals[name] = own
+                    original = getattr(self.handler_class, name)
+                    setattr(self.handler_class, name, self._timed(name, original))
+            if self.timings_timer:
+                self.timings_timer.cancel()
+                self.timings_timer = None
+            if seconds:
+                self.timings_timer = threading.Timer(seconds, self.disable_timings)
+                self.timings_timer.daemon = True
+                self.timings_timer.start()
+
+    def disable_timings(self):
+        """Put the original methods back."""
+        with self.lock:
+            for name, own in self.originals.items():
+                if own is None:
+                    delattr(self.handler_class, name)
+                else:
+                    setattr(self.handler_class, name, own)
+            self.originals = {}
+            if self.timings_timer:
+                self.timings_timer.cancel()
+                self.timings_timer = None
+
+    def _timed(self, name, original):
+        profiling = self
+        outer = name == 'do_GET'
+
+        @functools.wraps(original)
+        def timed(handler, *args, **kwargs):
+            timings = handler.__dict__.get('_phase_timings')
+            if outer and timings is None:
+                if random.random() >= profiling.rate:
+                    return original(handler, *args, **kwargs)
+                timings = handler._phase_timings = {}
+            elif timings is None:
+                return original(handler, *args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return original(handler, *args, **kwargs)
+            finally:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+                if outer:
+                    del handler._phase_timings
+                    profiling.timings.record(timings)
+        return timed
+
+    # -- sampling profiler --------------------------------------------------
+
+    def start_profile(self, seconds=DEFAULT_SECONDS, interval=DEFAULT_INTERVAL, rate=DEFAULT_RATE):
+        with self.lock:
+            if self.sampler and self.sampler.is_alive():
+                return self.sampler.path
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            path = os.path.join(self.output_dir, f'profile-{os.getpid()}-{stamp}.folded')
+            self.sampler = Sampler(seconds, interval, path)
+            self.sampler.start()
+            self.last_profile = path
+        if rate:
+            self.enable_timings(rate, seconds)
+        return path
+
+    def stop_profile(self):
+        sampler = self.sampler
+        if sampler and sampler.is_alive():
+            sampler.stop()
+        self.disable_timings()
+        return sampler.path if sampler else None
+
+    def profiling(self):
+        return bool(self.sampler and self.sampler.is_alive())
+
+    # -- memory ---------------------------------------------------------------
+
+    def memory_diff(self, top=MEMORY_TOP):
+        """Lines describing allocation growth since the previous snapshot."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(MEMORY_FRAMES)
+            self.snapshot = take_snapshot()
+            return ['tracemalloc started; request again to see growth since now']
+        snapshot = take_snapshot()
+        previous, self.snapshot = self.snapshot, snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f'traced: {current / 1024:.0f}K now, {peak / 1024:.0f}K peak']
+        lines += [str(stat) for stat in snapshot.compare_to(previous, 'lineno')[:top]]
+        return lines
+
+    def stop_memory(self):
+        tracemalloc.stop()
+        self.snapshot = None
+
+    def write_memory_diff(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f'memory-{os.getpid()}-{time.strftime("%Y%m%d-%H%M%S")}.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.memory_diff()) + '\n')
+        return path
+
+    def status(self):
+        return {'profiling': self.profiling(), 'last_profile': self.last_profile,
+                'timings': self.timing_enabled(), 'rate': self.rate if self.timing_enabled() else 0,
+                'tracemalloc': tracemalloc.is_tracing(), 'output_dir': self.output_dir}
+
+    # -- admin route --------------------------------------------------------
+
+    def handle_admin(self, handler):
+        """Serve /__admin/...; other clients get a plain 404."""
+        if handler.client_address[0] not in LOCALHOST:
+            handler.send_error(404)
+            return True
+        # Admin GETs have side effects: refuse anything a web page in the
+        # developer's browser could send (curl and the address bar send neither)
+        if handler.headers.get('Origin') or handler.headers.get('Sec-Fetch-Site', 'none') != 'none':
+            return self._send(handler, {'error': 'cross-site admin requests are refused'}, 403)
+        url = urlsplit(handler.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        route = url.path[len(ADMIN_PREFIX):].strip('/')
+        try:
+            if route == '':
+                return self._send(handler, self.status())
+            if route == 'profile':
+                path = self.start_profile(float(query.get('seconds', DEFAULT_SECONDS)),
+                                          float(query.get('interval', DEFAULT_INTERVAL)),
+                                          float(query.get('rate', DEFAULT_RATE)))
+                return self._send(handler, {'profiling': True, 'output': path})
+            if route == 'profile/stop':
+                return self._send(handler, {'profiling': False, 'output': self.stop_profile()})
+            if route == 'profile/last':
+                if not self.last_profile or not os.path.exists(self.last_profile):
+                    return self._send(handler, {'error': 'no finished profile yet'}, 404)
+                with open(self.last_profile, encoding='utf-8') as f:
+                    return self._send(handler, f.read(), content_type='text/plain; charset=utf-8')
+            if route == 'timings':
+                if 'rate' in query:
+                    rate = float(query['rate'])
+                    if rate > 0:
+                        self.enable_timings(rate, float(query.get('seconds', 0)) or None)
+                    else:
+                        self.disable_timings()
+                return self._send(handler, dict(self.timings.report(), enabled=self.timing_enabled()))
+            if route == 'memory':
+                if query.get('stop'):
+                    self.stop_memory()
+                    return self._send(handler, {'tracemalloc': False})
+                return self._send(handler, '\n'.join(self.memory_diff()) + '\n',
+                                  content_type='text/plain; charset=utf-8')
+        except ValueError as e:
+            return self._send(handler, {'error': str(e)}, 400)
+        return self._send(handler, {'error': f'unknown admin route {route!r}'}, 404)
+
+    def _send(self, handler, body, status=200, content_type='application/json'):
+        if not isinstance(body, str):
+            body = json.dumps(body, indent=2)
+        data = body.encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-type', content_type)
+        handler.send_header('Content-Length', str(len(data)))
+        handler.send_header('Cache-Control', 'no-store')
+        # Skip the handler's own end_headers so no CORS headers are added
+        http.server.BaseHTTPRequestHandler.end_headers(handler)
+        handler.wfile.write(data)
+        return True
+
+    # -- signals ------------------------------------------------------------
+
+    def install_signals(self):
+        def toggle_profile():
+            if self.profiling():
+                print(f'🔬 Profile stopped: {self.stop_profile()}')
+            else:
+                print(f'🔬 Profiling for {DEFAULT_SECONDS}s -> {self.start_profile()}')
+            sys.stdout.flush()
+
+        def memory():
+            print(f'🧠 Memory diff: {self.write_memory_diff()}')
+            sys.stdout.flush()
+
+        def in_thread(work):
+            # Signal handlers run on the main thread, which may be holding
+            # self.lock inside an admin request; do the work elsewhere
+            return lambda signum, frame: threading.Thread(
+                target=work, name='profiling-signal', daemon=True).start()
+
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, in_thread(toggle_profile))
+            signal.signal(signal.SIGUSR2, in_thread(memory))
+
+
+def install(handler_class, output_dir=OUTPUT_DIR, signals=True):
+    """Add the /__admin/ route (and signal handlers) to a handler class."""
+    profiling = Profiling(handler_class, output_dir)
+    original_do_get = handler_class.do_GET
+
+    @functools.wraps(original_do_get)
+    def do_GET(handler):
+        if handler.path.startswith(ADMIN_PREFIX):
+            return profiling.handle_admin(handler)
+        return original_do_get(handler)
+
+    handler_class.do_GET = do_GET
+    handler_class.profiling = profiling
+    if signals:
+        profiling.install_signals()
+    return profiling
+
+
+def enabled_from_env():
+    return os.environ.get('EMPTYNEST_PROFILING', '') not in ('', '0')
+
+
+if __name__ == '__main__':
+    print(__doc__.strip())
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Fingerprint index of the top-level <section> blocks in every HTML file.
+
+Each file is split with partials.iter_sections(), every section is hashed
+after collapsing whitespace (so re-indented copies match), and the result is
+kept in .build-cache/sections.json. Files are only re-parsed when their mtime
+or size changes, so queries after the first run are in-memory lookups.
+
+    python3 section_index.py find MASTER_CLEAN.html#nest-approved
+    python3 section_index.py find --hash 3f9a1c
+    python3 section_index.py compare index.html MASTER_CLEAN.html ...
+    python3 section_index.py diff index.html MASTER_CLEAN.html [--section ID]
+    python3 section_index.py assemble HASH ... [--layout FILE] [-o OUT]
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from partials import iter_sections
+
+INDEX_PATH = os.path.join('.build-cache', 'sections.json')
+INDEX_VERSION = 1
+SKIP_DIRS = {'.git', '.build-cache', 'build', 'templates', 'node_modules', '__pycache__'}
+HASH_LEN = 16
+
+BETWEEN_TAGS_RE = re.compile(r'>\s+<')
+HEAD_RE = re.compile(r'<head\b[^>]*>', re.IGNORECASE)
+BASE_RE = re.compile(r'<base\b', re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize(text):
+    """Collapse whitespace runs and drop whitespace between tags."""
+    return BETWEEN_TAGS_RE.sub('><', WHITESPACE_RE.sub(' ', text)).strip()
+
+
+def fingerprint(text):
+    return hashlib.sha256(normalize(text).encode('utf-8')).hexdigest()[:HASH_LEN]
+
+
+def scan_file(path):
+    """Return [{name, hash, start, end}, ...] for one file's top-level sections."""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    sections = []
+    seen = {}
+    for name, start, end in iter_sections(text):
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            name = f'{name}~{seen[name]}'
+        sections.append({'name': name, 'hash': fingerprint(text[start:end]),
+                         'start': start, 'end': end})
+    return sections
+
+
+def iter_html_files(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for filename in sorted(filenames):
+            if filename.endswith('.html'):
+                yield os.path.relpath(os.path.join(dirpath, filename), root)
+
+
+class SectionIndex:
+    """Persistent section fingerprints for every HTML file under root."""
+
+    def __init__(self, root='.', path=INDEX_PATH):
+        self.root = root
+        self.path = os.path.join(root, path)
+        self.files = {}
+        self.by_hash = {}
+        self.scanned = 0
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == INDEX_VERSION:
+            self.files = data['files']
+            self._rebuild_lookup()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'files': self.files}, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+
+    def _rebuild_lookup(self):
+        self.by_hash = {}
+        for path, entry in self.files.items():
+            for section in entry['sections']:
+                self.by_hash.setdefault(section['hash'], []).append((path, section['name']))
+
+    def update(self):
+        """Re-scan files whose mtime or size changed; returns True if anything did."""
+        changed = False
+        present = set()
+        for path in iter_html_files(self.root):
+            present.add(path)
+            st = os.stat(os.path.join(self.root, path))
+            entry = self.files.get(path)
+            if entry and entry['mtime'] == st.st_mtime_ns and entry['size'] == st.st_size:
+                continue
+            self.files[path] = {'mtime': st.st_mtime_ns, 'size': st.st_size,
+                                'sections': scan_file(os.path.join(self.root, path))}
+            self.scanned += 1
+            changed = True
+        for path in set(self.files) - present:
+            del self.files[path]
+            changed = True
+        if changed:
+            self._rebuild_lookup()
+            self.save()
+        return changed
+
+    def sections(self, path):
+        """{name: hash} for one file, in document order."""
+        entry = self.files.get(os.path.normpath(path))
+        if entry is None:
+            raise KeyError(f'{path} is not in the index')
+        return {section['name']: section['hash'] for section in entry['sections']}
+
+    def resolve(self, prefix):
+        """Expand a (possibly shortened) hash to the full indexed hash."""
+        if prefix in self.by_hash:
+            return prefix
+        matches = [h for h in self.by_hash if h.startswith(prefix)]
+        if len(matches) != 1:
+            raise KeyError(f'{prefix}: {"ambiguous" if matches else "no such"} section hash')
+        return matches[0]
+
+    def find(self, path=None, section=None, hash=None):
+        """Files containing a section, given a hash or a file and section name."""
+        if hash is None:
+            hash = self.sections(path)[section]
+        hash = self.resolve(hash)
+        return hash, sorted(self.by_hash[hash])
+
+    def compare(self, paths):
+        """[(section, {path: hash or None}), ...] across the given files."""
+        rows = {}
+        for path in paths:
+            for name, hash in self.sections(path).items():
+                rows.setdefault(name, {})[path] = hash
+        return [(name, {path: hashes.get(path) for path in paths})
+                for name, hashes in rows.items()]
+
+    def read_section(self, hash):
+        """Original text of the first indexed copy of a section."""
+        hash = self.resolve(hash)
+        for path, name in self.by_hash[hash]:
+            for section in self.files[path]['sections']:
+                if section['name'] == name:
+                    with open(os.path.join(self.root, path), encoding='utf-8', errors='replace') as f:
+                        text = f.read()
+                    return text[section['start']:section['end']]
+        raise KeyError(hash)
+
+    def diff(self, a, b, section=None):
+        """Unified diffs of the sections that differ between two files."""
+        results = []
+        for name, hashes in self.compare([a, b]):
+            if section and name != section:
+                continue
+            ha, hb = hashes[a], hashes[b]
+            if ha == hb:
+                continue
+            left = self.read_section(ha).splitlines() if ha else []
+            right = self.read_section(hb).splitlines() if hb else []
+            results.append((name, list(difflib.unified_diff(
+                [line.strip() for line in left], [line.strip() for line in right],
+                f'{a}#{name}', f'{b}#{name}', lineterm=''))))
+        return results
+
+    def assemble(self, hashes, layout=None, base_href=False):
+        """Build a page from section hashes inside another file's shell.
+
+        The layout file defaults to the first file containing the first hash;
+        everything before its first section and after its last one is kept.
+        With base_href, a <base> pointing at the layout's directory is added so
+        its relative asset URLs still resolve when served from another path.
+        """
+        hashes = [self.resolve(h) for h in hashes]
+        layout = layout or self.by_hash[hashes[0]][0][0]
+        sections = self.files[os.path.normpath(layout)]['sections']
+        with open(os.path.join(self.root, layout), encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        head = text[:sections[0]['start']] if sections else text
+        tail = text[sections[-1]['end']:] if sections else ''
+        body = '\n\n    '.join(self.read_section(h) for h in hashes)
+        if base_href and not BASE_RE.search(head):
+            directory = os.path.dirname(os.path.normpath(layout)).replace(os.sep, '/')
+            base = f'<base href="/{directory + "/" if directory else ""}">'
+            match = HEAD_RE.search(head)
+            at = match.end() if match else 0
+            head = head[:at] + base + head[at:]
+        return head + body + tail
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--root', default=os.path.dirname(os.path.abspath(__file__)))
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('update', help='refresh the index')
+    find_cmd = commands.add_parser('find', help='files containing a section')
+    find_cmd.add_argument('target', nargs='?', help='FILE#section-id')
+    find_cmd.add_argument('--hash')
+    compare_cmd = commands.add_parser('compare', help='section hashes across files')
+    compare_cmd.add_argument('files', nargs='+')
+    diff_cmd = commands.add_parser('diff', help='diff differing sections of two files')
+    diff_cmd.add_argument('a')
+    diff_cmd.add_argument('b')
+    diff_cmd.add_argument('--section')
+    assemble_cmd = commands.add_parser('assemble', help='build a page from section hashes')
+    assemble_cmd.add_argument('hashes', nargs='+')
+    assemble_cmd.add_argument('--layout')
+    assemble_cmd.add_argument('-o', '--output')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    index = SectionIndex(args.root)
+    index.update()
+    try:
+        if args.command == 'update':
+            print(f'✅ {len(index.files)} files, {len(index.by_hash)} distinct sections '
+                  f'({index.scanned} re-scanned)')
+        elif args.command == 'find':
+            if args.hash:
+                hash, matches = index.find(hash=args.hash)
+            else:
+                path, _, section = (args.target or '').partition('#')
+                hash, matches = index.find(path, section)
+            print(f'🔍 {hash}')
+            for path, name in matches:
+                print(f'   {path}#{name}')
+        elif args.command == 'compare':
+            rows = index.compare(args.files)
+            width = max([len(name) for name, _ in rows] + [7])
+            print(' ' * width + '  ' + '  '.join(f'{i + 1:>8}' for i in range(len(args.files))))
+            for name, hashes in rows:
+                distinct = {h for h in hashes.values() if h}
+                mark = '=' if len(distinct) == 1 and None not in hashes.values() else '≠'
+                cells = '  '.join(f'{(h or "-")[:8]:>8}' for h in hashes.values())
+                print(f'{name:{width}}  {cells}  {mark}')
+            for i, path in enumerate(args.files):
+                print(f'  {i + 1}: {path}')
+        elif args.command == 'diff':
+            for name, lines in index.diff(args.a, args.b, args.section):
+                print('\n'.join(lines) if lines else f'# {name}: whitespace-only difference')
+        elif args.command == 'assemble':
+            page = index.assemble(args.hashes, args.layout)
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    f.write(page)
+                print(f'✅ Wrote {args.output} ({len(page) // 1024}K)')
+            else:
+                sys.stdout.write(page)
+    except KeyError as e:
+        print(f'❌ {e.args[0]}', file=sys.stderr)
+        return 1
+    print(f'⏱  {(time.perf_counter() - started) * 1000:.1f}ms', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
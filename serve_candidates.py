@@ -3,19 +3,44 @@ import http.server
 import socketserver
 import os
 import sys
+import json
+import time
+import difflib
+import html as htmllib
 from datetime import datetime
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+from section_index import SectionIndex
+
+# Serve different candidate files based on path
+candidates = {
+    '/candidate1': '/empty-nest-website/index-backup.html',  # 213K - most complete
+    '/candidate2': '/MASTER_CLEAN.html',                    # 206K - clean version  
+    '/candidate3': '/empty-nest-deploy/index.html',         # 203K - deploy version
+    '/candidate4': '/index-integrated-correct.html',        # 83K - "correct" named
+    '/candidate5': '/empty-nest-website/index.html',        # 59K - recently modified
+}
+
+# Section fingerprints of every HTML file, refreshed at most once a second
+section_index = None
+last_index_update = 0.0
+
+
+def get_section_index():
+    global section_index, last_index_update
+    if section_index is None:
+        section_index = SectionIndex('.')
+    if time.monotonic() - last_index_update >= 1.0:
+        section_index.update()
+        last_index_update = time.monotonic()
+    return section_index
+
 
 class CandidateHandler(http.server.SimpleHTTPRequestHandler):
     def do_GET(self):
-        # Serve different candidate files based on path
-        candidates = {
-            '/candidate1': '/empty-nest-website/index-backup.html',  # 213K - most complete
-            '/candidate2': '/MASTER_CLEAN.html',                    # 206K - clean version  
-            '/candidate3': '/empty-nest-deploy/index.html',         # 203K - deploy version
-            '/candidate4': '/index-integrated-correct.html',        # 83K - "correct" named
-            '/candidate5': '/empty-nest-website/index.html',        # 59K - recently modified
-        }
-        
+        if self.path == '/sections' or self.path.startswith('/sections/') or self.path.startswith('/sections?'):
+            return self.handle_sections()
+
         # If requesting root, show index of candidates
         if self.path == '/' or self.path == '/index.html':
             self.send_response(200)
@@ -51,6 +76,7 @@ class CandidateHandler(http.server.SimpleHTTPRequestHandler):
                     </a>
                 </div>
                 <p style="margin-top: 2rem; color: #666;">Test each candidate and let me know which one shows the correct "Make the Next Part Yours" hero + Meet Kellie + Nest Approved sections.</p>
+                <p style="color: #666;">Or <a href="/sections">compare the candidates section by section</a> without opening each page.</p>
             </body>
             </html>
             '''
@@ -62,7 +88,93 @@ class CandidateHandler(http.server.SimpleHTTPRequestHandler):
             self.path = candidates[self.path]
             
         return super().do_GET()
-    
+
+    def send_body(self, body, content_type='text/html; charset=utf-8', status=200):
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data, status=200):
+        self.send_body(json.dumps(data, indent=2), 'application/json', status)
+
+    def handle_sections(self):
+        # /sections                       -> per-section table of the candidates
+        # /sections/find?file=F&section=S -> files containing that exact section (or ?hash=H)
+        # /sections/compare?file=A&file=B -> per-section hashes (HTML, or &format=json)
+        # /sections/diff?a=A&b=B&section=S -> side-by-side diff of one section
+        # /sections/assemble?hash=H&hash=H&layout=F -> page built from those sections
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        route = url.path.rstrip('/')
+        index = get_section_index()
+        try:
+            if route in ('/sections', '/sections/compare'):
+                files = query.get('file') or [p.lstrip('/') for p in candidates.values()
+                                              if p.lstrip('/') in index.files]
+                rows = index.compare(files)
+                if query.get('format') == ['json']:
+                    return self.send_json({'files': files, 'sections': dict(rows)})
+                return self.send_body(self.compare_page(files, rows))
+            if route == '/sections/find':
+                if 'hash' in query:
+                    hash, matches = index.find(hash=query['hash'][0])
+                else:
+                    hash, matches = index.find(query['file'][0], query['section'][0])
+                return self.send_json({'hash': hash, 'files': [f'{p}#{n}' for p, n in matches]})
+            if route == '/sections/diff':
+                a, b, name = query['a'][0], query['b'][0], query['section'][0]
+                return self.send_body(self.diff_page(index, a, b, name))
+            if route == '/sections/assemble':
+                layout = query.get('layout', [None])[0]
+                return self.send_body(index.assemble(query['hash'], layout, base_href=True))
+        except KeyError as e:
+            return self.send_json({'error': f'not found: {e.args[0]}'}, 404)
+        self.send_json({'error': f'unknown route {route}'}, 404)
+
+    def compare_page(self, files, rows):
+        palette = ['#e8f5e9', '#fff3e0', '#e3f2fd', '#fce4ec', '#f3e5f5', '#e0f7fa']
+        header = ''.join(f'<th>{i + 1}. {htmllib.escape(f)}</th>' for i, f in enumerate(files))
+        body = []
+        for name, hashes in rows:
+            colours = {}
+            cells = []
+            for path, hash in hashes.items():
+                if hash is None:
+                    cells.append('<td style="color: #bbb;">-</td>')
+                    continue
+                colour = colours.setdefault(hash, palette[len(colours) % len(palette)])
+                link = f'/sections/find?{urlencode({"hash": hash})}'
+                diff = ''
+                if path != files[0] and hashes[files[0]] not in (None, hash):
+                    query = urlencode({'a': files[0], 'b': path, 'section': name})
+                    diff = f' <a href="/sections/diff?{query}">diff vs 1</a>'
+                cells.append(f'<td style="background: {colour};"><a href="{link}"><code>{hash[:8]}</code></a>{diff}</td>')
+            body.append(f'<tr><th style="text-align: left;">#{htmllib.escape(name)}</th>{"".join(cells)}</tr>')
+        return f'''<!DOCTYPE html>
+            <html>
+            <head><title>Sections by Candidate</title></head>
+            <body style="font-family: Arial; padding: 2rem; background: #f5f5f5;">
+                <h1>🧬 Sections by Candidate</h1>
+                <p>Same colour in a row = identical section (ignoring whitespace).</p>
+                <table cellpadding="8" style="border-collapse: collapse; background: white;">
+                    <tr><th></th>{header}</tr>
+                    {"".join(body)}
+                </table>
+                <p><a href="/">← Back to candidates</a></p>
+            </body>
+            </html>'''
+
+    def diff_page(self, index, a, b, name):
+        left = index.read_section(index.sections(a)[name]).splitlines() if name in index.sections(a) else []
+        right = index.read_section(index.sections(b)[name]).splitlines() if name in index.sections(b) else []
+        table = difflib.HtmlDiff(wrapcolumn=100).make_file(
+            [line.strip() for line in left], [line.strip() for line in right],
+            f'{a}#{name}', f'{b}#{name}', context=True)
+        return table
+
     def end_headers(self):
         self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate, private, max-age=0')
         self.send_header('Pragma', 'no-cache')
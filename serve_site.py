@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+import http.server
+import socketserver
+import os
+import sys
+import time
+from datetime import datetime
+import json
+from urllib.parse import urlsplit, parse_qs
+
+from catalog import Catalog, PAGE_PATH as CATALOG_PAGE
+from partials import Site, page_etag, page_length
+import profiling
+
+# Pages are assembled from the compiled fragments in templates/ (see
+# partials.py) instead of keeping a full copy of every variant around.
+PORT = 3334
+DEFAULT_PAGE = 'index'
+REFRESH_INTERVAL = 1.0
+MAX_PER_PAGE = 100
+
+
+class SiteHandler(http.server.SimpleHTTPRequestHandler):
+    site = None
+    catalog = None
+    default_page = DEFAULT_PAGE
+    last_refresh = 0.0
+
+    def page_for_path(self, path):
+        """Map /, /<page> and /<page>.html to a page name, or None."""
+        name = path.strip('/') or self.default_page
+        if name.endswith('.html'):
+            name = name[:-len('.html')]
+        if name not in self.site.pages:
+            return None
+        return name
+
+    def refresh_site(self):
+        now = time.monotonic()
+        if now - SiteHandler.last_refresh >= REFRESH_INTERVAL:
+            SiteHandler.last_refresh = now
+            self.site.refresh()
+            if self.catalog is not None:
+                self.catalog.refresh()
+
+    def do_GET(self):
+        self.send_page(write_body=True)
+
+    def do_HEAD(self):
+        self.send_page(write_body=False)
+
+    def send_page(self, write_body):
+        self.refresh_site()
+        url = urlsplit(self.path)
+        if url.path == '/api/catalog' or url.path.startswith('/api/catalog/'):
+            return self.send_catalog(url, write_body)
+        if url.path == '/catalog.html':
+            # Featured-only page from catalog.py; assets still resolve from /
+            self.path = '/' + CATALOG_PAGE.replace(os.sep, '/')
+        name = self.page_for_path(url.path)
+        if name is None:
+            return super().do_GET() if write_body else super().do_HEAD()
+
+        fragments = self.site.compile_page(name)
+        etag = page_etag(fragments)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(page_length(fragments)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        if write_body:
+            for _, fragment in fragments:
+                self.wfile.write(fragment)
+
+    def send_catalog(self, url, write_body):
+        # /api/catalog                  -> categories and card counts
+        # /api/catalog/<category>       -> ?page=1&per_page=24&format=json|html
+        if self.catalog is None or self.catalog.version is None:
+            return self.send_error(404, 'Catalog not built (python3 catalog.py build)')
+        category = url.path[len('/api/catalog'):].strip('/')
+        if not category:
+            response = (json.dumps(self.catalog.summary()).encode('utf-8'), 'application/json',
+                        f'"{self.catalog.version}"', {})
+        else:
+            query = parse_qs(url.query)
+            try:
+                page = int(query.get('page', ['1'])[0])
+                per_page = min(int(query.get('per_page', ['24'])[0]), MAX_PER_PAGE)
+            except ValueError:
+                return self.send_error(400, 'page and per_page must be integers')
+            fmt = 'html' if query.get('format') == ['html'] else 'json'
+            response = self.catalog.query(category, page, per_page, fmt)
+            if response is None:
+                return self.send_error(404, f'No such category or page: {category}')
+
+        body, content_type, etag, headers = response
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if write_body:
+            self.wfile.write(body)
+
+    def end_headers(self):
+        # Always revalidate; unchanged pages come back as 304 via the ETag
+        self.send_header('Cache-Control', 'no-cache, must-revalidate, max-age=0')
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        sys.stdout.write(f"[{timestamp}] {format % args}\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    os.chdir('/home/user/webapp')
+    SiteHandler.site = Site()
+    SiteHandler.site.refresh()
+    SiteHandler.catalog = Catalog()
+    SiteHandler.catalog.refresh()
+    SiteHandler.last_refresh = time.monotonic()
+    if profiling.enabled_from_env():
+        profiling.install(SiteHandler)
+
+    with socketserver.TCPServer(("0.0.0.0", PORT), SiteHandler) as httpd:
+        pages = SiteHandler.site.pages
+        print(f"✅ PARTIALS SERVER")
+        print(f"🧩 Pages: {len(pages)} from templates/ ({SiteHandler.site.cache.size() // 1024}K of fragments)")
+        print(f"📄 Default: {DEFAULT_PAGE}")
+        if SiteHandler.catalog.version:
+            print(f"🏷️  Catalog: {len(SiteHandler.catalog.cards)} cards at /api/catalog (page: /catalog.html)")
+        print(f"🌐 Port: {PORT}")
+        if profiling.enabled_from_env():
+            print(f"🔬 Profiling: kill -USR1 {os.getpid()} or http://localhost:{PORT}/__admin/")
+        print(f"⏰ Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        sys.stdout.flush()
+        httpd.serve_forever()
@@ -0,0 +1,151 @@
+import http.client
+import http.server
+import os
+import socketserver
+import sys
+import threading
+import tracemalloc
+import unittest
+
+# profiling.py lives one directory up, next to the servers
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'empty-nest-website'))
+import profiling
+
+
+def handler_class(base=http.server.SimpleHTTPRequestHandler):
+    """A fresh handler class per test, since install() patches the class."""
+
+    class Handler(base):
+        calls = []
+
+        def do_GET(self):
+            # Record the callers: install()'s admin shim, then request() when
+            # idle or a timing wrapper while timings are on
+            caller = sys._getframe(1)
+            callers = (caller.f_code.co_name, caller.f_back.f_code.co_name)
+            self.calls.append((self.path, callers))
+            self.log_message('%s', self.path)
+
+        def end_headers(self):
+            super().end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def request(handler_class, path):
+    """Run do_GET on a handler without a socket."""
+    handler = handler_class.__new__(handler_class)
+    handler.path = path
+    handler.do_GET()
+    return handler
+
+
+class IdleProfilingTest(unittest.TestCase):
+    def setUp(self):
+        self.Handler = handler_class()
+        self.before = {name: self.Handler.__dict__.get(name) for name in profiling.PHASES}
+        self.threads = threading.active_count()
+        self.profiling = profiling.install(self.Handler, signals=False)
+
+    def tearDown(self):
+        self.profiling.stop_profile()
+        if tracemalloc.is_tracing():
+            self.profiling.stop_memory()
+
+    def assert_idle(self):
+        for name in profiling.PHASES:
+            if name != 'do_GET':
+                self.assertIs(self.Handler.__dict__.get(name), self.before[name], name)
+        self.assertEqual(threading.active_count(), self.threads)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_installed_but_idle_reaches_original_handler_directly(self):
+        handler = request(self.Handler, '/index.html')
+        self.assertEqual(self.Handler.calls, [('/index.html', ('do_GET', 'request'))])
+        self.assertNotIn('_phase_timings', handler.__dict__)
+        self.assert_idle()
+
+    def test_disabling_timings_restores_original_methods(self):
+        installed_get = self.Handler.__dict__['do_GET']
+        self.profiling.enable_timings(rate=1.0)
+        self.assertIsNot(self.Handler.__dict__['end_headers'], self.before['end_headers'])
+        self.assertIn('log_message', self.Handler.__dict__)
+        self.profiling.disable_timings()
+        self.assertIs(self.Handler.__dict__['do_GET'], installed_get)
+        self.assert_idle()
+        request(self.Handler, '/after')
+        self.assertEqual(self.Handler.calls[-1], ('/after', ('do_GET', 'request')))
+
+    def test_sampled_requests_record_phases(self):
+        self.profiling.enable_timings(rate=1.0)
+        request(self.Handler, '/timed')
+        self.assertEqual(self.Handler.calls, [('/timed', ('do_GET', 'timed'))])
+        report = self.profiling.timings.report()
+        self.assertEqual(report['sampled_requests'], 1)
+        self.assertEqual(set(report['phases']), {'do_GET', 'log_message'})
+        self.profiling.disable_timings()
+        self.assert_idle()
+
+    def test_unsampled_requests_record_nothing(self):
+        self.profiling.enable_timings(rate=0.0)
+        handler = request(self.Handler, '/skipped')
+        self.assertNotIn('_phase_timings', handler.__dict__)
+        self.assertEqual(self.profiling.timings.report()['sampled_requests'], 0)
+        self.profiling.disable_timings()
+
+    def test_memory_diff_ignores_tracemalloc_itself(self):
+        self.assertIn('tracemalloc started', self.profiling.memory_diff()[0])
+        kept = [bytearray(1024) for _ in range(100)]
+        lines = self.profiling.memory_diff()
+        self.assertTrue(lines[0].startswith('traced:'))
+        self.assertFalse([line for line in lines if 'tracemalloc.py' in line])
+        self.assertTrue(any('test_profiling.py' in line for line in lines))
+        del kept
+        self.profiling.stop_memory()
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+class AdminRouteTest(unittest.TestCase):
+    def setUp(self):
+        import cors_server
+        self.Handler = handler_class(cors_server.CORSHTTPRequestHandler)
+        self.profiling = profiling.install(self.Handler, signals=False)
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), self.Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.profiling.stop_profile()
+
+    def get(self, path, headers=None):
+        connection = http.client.HTTPConnection(*self.server.server_address)
+        connection.request('GET', path, headers=headers or {})
+        response = connection.getresponse()
+        response.read()
+        connection.close()
+        return response
+
+    def test_status_has_no_cors_headers(self):
+        response = self.get('/__admin/')
+        self.assertEqual(response.status, 200)
+        self.assertIsNone(response.getheader('Access-Control-Allow-Origin'))
+
+    def test_cross_site_requests_are_refused(self):
+        for headers in ({'Origin': 'http://example.com'}, {'Sec-Fetch-Site': 'cross-site'}):
+            response = self.get('/__admin/profile?seconds=1', headers)
+            self.assertEqual(response.status, 403)
+            self.assertIsNone(response.getheader('Access-Control-Allow-Origin'))
+        self.assertFalse(self.profiling.profiling())
+        self.assertFalse(self.profiling.timing_enabled())
+
+
+if __name__ == '__main__':
+    unittest.main()